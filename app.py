@@ -1,14 +1,65 @@
-from flask import Flask, request, render_template
-import numpy as np
+from flask import Flask, Response, request, render_template, jsonify, g
 import pandas as pd
+import io
+import os
+import time
 import webbrowser  # Import webbrowser to open the browser
 
-from sklearn.preprocessing import StandardScaler
-from src.pipeline.predict_pipeline import CustomData, PredictPipeline
+from src.pipeline.predict_pipeline import CustomData, PredictPipeline, build_batch_data_frame
+from src.pipeline.micro_batcher import MicroBatcher, MicroBatcherConfig
+from src.pipeline.prediction_cache import prediction_cache_from_env
+from src.pipeline.stage_timings import stage_timings
+from src.pipeline.metrics import (BATCH_ROWS_BUCKETS, REQUEST_SECONDS_BUCKETS, PrometheusText,
+                                  render_service_metrics, service_metrics)
+from src.logger import logging
 
 application = Flask(__name__)
 app = application
 
+# LRU cache of predictions per input combination, dropped when a new model is deployed
+# (opt-in with PREDICTION_CACHE_SIZE=<entries>; PREDICTION_CACHE_TTL=0 keeps entries until then,
+# frames above PREDICTION_CACHE_MAX_FRAME_ROWS rows bypass it)
+prediction_cache = prediction_cache_from_env()
+
+# one pipeline for the whole process; artifacts are cached in the shared registry
+# (PREDICTION_LOOKUP_TABLE=1 answers from artifacts/prediction_table.npy, see src/components/lookup_table.py)
+predict_pipeline = PredictPipeline(
+    cache=prediction_cache,
+    use_lookup_table=os.environ.get("PREDICTION_LOOKUP_TABLE", "0") == "1",
+)
+
+# optional: coalesce concurrent form predictions into one model call
+# (MICRO_BATCHING=1, tuned with MICRO_BATCH_MAX_SIZE / MICRO_BATCH_MAX_WAIT_MS)
+def create_micro_batcher():
+    if os.environ.get("MICRO_BATCHING", "0") != "1":
+        return None
+    return MicroBatcher(
+        predict_pipeline.predict,
+        MicroBatcherConfig(
+            max_batch_size=int(os.environ.get("MICRO_BATCH_MAX_SIZE", 32)),
+            max_wait_ms=float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", 5)),
+        ),
+    )
+
+# its worker thread does not survive a fork: serve.py creates a fresh one in every worker
+micro_batcher = create_micro_batcher()
+
+## whole-request latency, next to the per-stage spans recorded along the prediction path
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    seconds = time.perf_counter() - g.request_start
+    if request.endpoint in ('predict_datapoint', 'predict_batch'):
+        stage_timings.observe(f"request:{request.endpoint}", seconds)
+    # route template, not the raw path, so unknown URLs don't create new series
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    service_metrics.inc("http_requests_total", (("route", route), ("method", request.method), ("status", response.status_code)))
+    service_metrics.observe("http_request_duration_seconds", seconds, REQUEST_SECONDS_BUCKETS, (("route", route),))
+    return response
+
 ## Route for the default page
 @app.route('/')
 def index():
@@ -21,25 +72,82 @@ def predict_datapoint():
         return render_template('home.html')
     else:
         try:
-            data = CustomData(
-                gender=request.form.get('gender'),
-                race_ethnicity=request.form.get('ethnicity'),
-                parental_level_of_education=request.form.get('parental_level_of_education'),
-                lunch=request.form.get('lunch'),
-                test_preparation_course=request.form.get('test_preparation_course'),
-                reading_score=float(request.form.get('reading_score')),
-                writing_score=float(request.form.get('writing_score'))
-            )
-            pred_df = data.get_data_as_data_frame()
-            print(pred_df)
-            predict_pipeline = PredictPipeline()
-            results = predict_pipeline.predict(pred_df)
+            with stage_timings.span("parse_request"):
+                data = CustomData(
+                    gender=request.form.get('gender'),
+                    race_ethnicity=request.form.get('ethnicity'),
+                    parental_level_of_education=request.form.get('parental_level_of_education'),
+                    lunch=request.form.get('lunch'),
+                    test_preparation_course=request.form.get('test_preparation_course'),
+                    reading_score=float(request.form.get('reading_score')),
+                    writing_score=float(request.form.get('writing_score'))
+                )
+            service_metrics.observe("prediction_batch_rows", 1, BATCH_ROWS_BUCKETS, (("route", "/predictdata"),))
+            if micro_batcher is not None:
+                with stage_timings.span("build_dataframe"):
+                    pred_df = data.get_data_as_data_frame()
+                results = micro_batcher.predict(pred_df)
+            else:
+                # single record: compiled encoder, no DataFrame
+                results = predict_pipeline.predict_record(data.get_data_as_dict())
             return render_template('home.html', results=results[0])
         except Exception as e:
-            print(f"Error: {e}")
+            logging.info(f"Prediction failed: {e}")
             return render_template('home.html', results="Error occurred")
 
+## Batch scoring API: JSON list of records (or {"records": [...]}) or a CSV body / "file" upload
+## Runs one preprocessor.transform + model.predict over the whole batch, predictions keep input order
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        with stage_timings.span("parse_request"):
+            if 'file' in request.files:
+                records = pd.read_csv(request.files['file'])
+            elif request.mimetype == 'text/csv':
+                records = pd.read_csv(io.BytesIO(request.get_data()))
+            else:
+                payload = request.get_json(force=True, silent=True)
+                records = payload.get('records') if isinstance(payload, dict) else payload
+        with stage_timings.span("build_dataframe"):
+            pred_df = build_batch_data_frame(records)
+    except Exception as e:
+        return jsonify({"error": f"Invalid batch: {e}"}), 400
+
+    service_metrics.observe("prediction_batch_rows", len(pred_df), BATCH_ROWS_BUCKETS, (("route", "/api/predict/batch"),))
+    try:
+        results = predict_pipeline.predict(pred_df)
+        return jsonify({"count": len(results), "predictions": [float(r) for r in results]})
+    except Exception as e:
+        logging.info(f"Batch prediction failed: {e}")
+        return jsonify({"error": "Prediction failed"}), 500
+
+## Artifact cache counters (hits / misses / reloads)
+@app.route('/artifacts/stats')
+def artifact_stats():
+    return jsonify(predict_pipeline.registry.stats())
+
+## Prediction cache counters (size / hit rate / evictions / invalidations)
+@app.route('/cache/stats')
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **prediction_cache.stats()})
+
+## Per-stage latency histograms: count, mean, p50 / p95 / p99 and max in ms
+## (parse_request, build_dataframe, load_artifacts, lookup_table, transform, predict, request:<endpoint>)
+@app.route('/metrics/latency')
+def latency_metrics():
+    return jsonify(stage_timings.snapshot())
+
+## Prometheus scrape endpoint: request counts / latency, batch sizes, stage latency,
+## cache hit ratios, artifact load times and the deployed model version (per worker process)
+@app.route('/metrics')
+def prometheus_metrics():
+    body = render_service_metrics(predict_pipeline, stage_timings, prediction_cache, micro_batcher)
+    return Response(body, content_type=PrometheusText.content_type)
+
 if __name__ == "__main__":
+    # development server; use `python serve.py` for production
     # Open browser to /predictdata on startup
     webbrowser.open('http://127.0.0.1:5000/predictdata')
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
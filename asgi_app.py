@@ -0,0 +1,161 @@
+'''
+Asyncio (ASGI) variant of app.py: same pages and prediction APIs, served by
+Starlette under uvicorn. Predictions run on the bounded AsyncPredictor pool,
+so the event loop keeps serving other (keep-alive) connections while a model
+call is in progress, and requests beyond ASYNC_MAX_PENDING get a 503.
+
+    python asgi_app.py [--host 0.0.0.0] [--port 8000]
+
+Pool: ASYNC_EXECUTOR=thread|process, ASYNC_MAX_WORKERS, ASYNC_MAX_PENDING.
+Prediction cache: PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_MAX_FRAME_ROWS; lookup table:
+PREDICTION_LOOKUP_TABLE=1 (as in app.py).
+'''
+import argparse
+import io
+import os
+import time
+from contextlib import asynccontextmanager
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+from src.pipeline.async_predictor import AsyncPredictor, AsyncPredictorConfig, Overloaded
+from src.pipeline.predict_pipeline import CustomData, PredictPipeline, build_batch_data_frame
+from src.pipeline.prediction_cache import prediction_cache_from_env
+from src.pipeline.stage_timings import stage_timings
+from src.logger import logging
+
+templates = Jinja2Templates(directory="templates")
+
+predictor = AsyncPredictor(
+    pipeline=PredictPipeline(
+        cache=prediction_cache_from_env(),
+        use_lookup_table=os.environ.get("PREDICTION_LOOKUP_TABLE", "0") == "1",
+    ),
+    config=AsyncPredictorConfig(
+        max_workers=int(os.environ.get("ASYNC_MAX_WORKERS", os.cpu_count() or 1)),
+        max_pending=int(os.environ.get("ASYNC_MAX_PENDING", 64)),
+        executor=os.environ.get("ASYNC_EXECUTOR", "thread"),
+    )
+)
+
+OVERLOADED_HEADERS = {"Retry-After": "1"}
+
+
+## Route for the default page
+async def index(request):
+    return templates.TemplateResponse(request, "home.html")
+
+
+## Route for prediction page
+async def predict_datapoint(request):
+    if request.method == "GET":
+        return templates.TemplateResponse(request, "home.html")
+
+    start = time.perf_counter()
+    try:
+        with stage_timings.span("parse_request"):
+            form = await request.form()
+            data = CustomData(
+                gender=form.get("gender"),
+                race_ethnicity=form.get("ethnicity"),
+                parental_level_of_education=form.get("parental_level_of_education"),
+                lunch=form.get("lunch"),
+                test_preparation_course=form.get("test_preparation_course"),
+                reading_score=float(form.get("reading_score")),
+                writing_score=float(form.get("writing_score")),
+            )
+        results = await predictor.predict_record(data.get_data_as_dict())
+        return templates.TemplateResponse(request, "home.html", {"results": results[0]})
+    except Overloaded:
+        return templates.TemplateResponse(request, "home.html", {"results": "Error occurred"},
+                                          status_code=503, headers=OVERLOADED_HEADERS)
+    except Exception as e:
+        logging.info(f"Prediction failed: {e}")
+        return templates.TemplateResponse(request, "home.html", {"results": "Error occurred"})
+    finally:
+        stage_timings.observe("request:predict_datapoint", time.perf_counter() - start)
+
+
+## Batch scoring API, same input formats as app.py: JSON list / {"records": [...]}, CSV body or "file" upload
+async def predict_batch(request):
+    start = time.perf_counter()
+    try:
+        try:
+            with stage_timings.span("parse_request"):
+                if request.headers.get("content-type", "").startswith("multipart/form-data"):
+                    upload = (await request.form())["file"]
+                    records = pd.read_csv(io.BytesIO(await upload.read()))
+                elif request.headers.get("content-type", "").startswith("text/csv"):
+                    records = pd.read_csv(io.BytesIO(await request.body()))
+                else:
+                    payload = await request.json()
+                    records = payload.get("records") if isinstance(payload, dict) else payload
+            with stage_timings.span("build_dataframe"):
+                pred_df = build_batch_data_frame(records)
+        except Exception as e:
+            return JSONResponse({"error": f"Invalid batch: {e}"}, status_code=400)
+
+        try:
+            results = await predictor.predict(pred_df)
+            return JSONResponse({"count": len(results), "predictions": [float(r) for r in results]})
+        except Overloaded:
+            return JSONResponse({"error": "Server overloaded, retry later"}, status_code=503, headers=OVERLOADED_HEADERS)
+        except Exception as e:
+            logging.info(f"Batch prediction failed: {e}")
+            return JSONResponse({"error": "Prediction failed"}, status_code=500)
+    finally:
+        stage_timings.observe("request:predict_batch", time.perf_counter() - start)
+
+
+## Artifact cache counters and prediction pool state
+async def artifact_stats(request):
+    return JSONResponse({**predictor.pipeline.registry.stats(), "predictor": predictor.stats()})
+
+
+## Prediction cache counters (per process: with ASYNC_EXECUTOR=process the pool processes keep their own)
+async def cache_stats(request):
+    cache = predictor.pipeline.cache
+    if cache is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse({"enabled": True, **cache.stats()})
+
+
+## Per-stage latency histograms (with ASYNC_EXECUTOR=process the pipeline stages are timed in the pool processes)
+async def latency_metrics(request):
+    return JSONResponse(stage_timings.snapshot())
+
+
+@asynccontextmanager
+async def lifespan(app):
+    predictor.warm_up()
+    yield
+    predictor.close()
+
+
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/predictdata", predict_datapoint, methods=["GET", "POST"]),
+        Route("/api/predict/batch", predict_batch, methods=["POST"]),
+        Route("/artifacts/stats", artifact_stats),
+        Route("/cache/stats", cache_stats),
+        Route("/metrics/latency", latency_metrics),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the asyncio prediction service with uvicorn")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    args = parser.parse_args()
+
+    # large accept backlog and long keep-alive for many idle client connections
+    uvicorn.run(app, host=args.host, port=args.port, backlog=4096, timeout_keep_alive=75)
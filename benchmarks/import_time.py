@@ -0,0 +1,56 @@
+'''
+Cold-start cost of the entry points: wall time to import each module in a fresh
+interpreter, and which heavy ML libraries that import pulled in. The last row
+also loads the persisted artifacts and scores one record, i.e. what the first
+request of a freshly started server pays.
+
+Run from the repository root (reads artifacts/, writes nothing):
+
+    python -m benchmarks.import_time
+'''
+import json
+import subprocess
+import sys
+
+REPEATS = 5
+
+HEAVY_LIBRARIES = ("sklearn", "scipy", "xgboost", "catboost")
+
+ENTRY_POINTS = {
+    "app": "import app",
+    "src.pipeline.predict_pipeline": "import src.pipeline.predict_pipeline",
+    "src.components.data_ingestion": "import src.components.data_ingestion",
+    "src.components.model_trainer": "import src.components.model_trainer",
+    "first prediction": (
+        "from src.pipeline.predict_pipeline import PredictPipeline\n"
+        "PredictPipeline().predict_record(('female', 'group B', \"bachelor's degree\", 'standard', 'none', 72, 74))"
+    ),
+}
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+exec(compile({code!r}, "<entry point>", "exec"))
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": sorted(lib for lib in {libraries!r} if lib in sys.modules)}}))
+'''
+
+
+def measure(code):
+    probe = _PROBE.format(code=code, libraries=HEAVY_LIBRARIES)
+    runs = []
+    for _ in range(REPEATS):
+        output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return min(run["seconds"] for run in runs), runs[-1]["loaded"]
+
+
+def main():
+    print(f"{'entry point':<34}{'import s':>10}  heavy libraries loaded")
+    for name, code in ENTRY_POINTS.items():
+        seconds, loaded = measure(code)
+        print(f"{name:<34}{seconds:>10.3f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+'''
+float32 vs float64 feature pipeline: test R2, fit time and predict time of every
+model in ModelTrainer.get_models() (default hyperparameters, fixed seeds), plus
+the FeatureEncoder batch transform used at serving time.
+
+Run from the repository root (reads artifacts/train.csv and artifacts/test.csv,
+writes nothing):
+
+    python -m benchmarks.precision
+'''
+import os
+import time
+
+from sklearn.metrics import r2_score
+
+from src.components.data_transformation import PRECISIONS, DataTransformation
+from src.components.feature_encoder import FeatureEncoder
+from src.components.model_trainer import ModelTrainer
+from src.schema import TARGET_COLUMN, apply_schema
+from src.utils import read_frame
+
+REPEATS = 5
+
+
+def best_of(fn, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    train_df = apply_schema(read_frame(os.path.join("artifacts", "train.csv")))
+    test_df = apply_schema(read_frame(os.path.join("artifacts", "test.csv")))
+    X_train_df, y_train = train_df.drop(columns=[TARGET_COLUMN]), train_df[TARGET_COLUMN].to_numpy()
+    X_test_df, y_test = test_df.drop(columns=[TARGET_COLUMN]), test_df[TARGET_COLUMN].to_numpy()
+
+    preprocessor = DataTransformation().get_data_transformer_object().fit(X_train_df)
+
+    print(f"{'model':<24}{'precision':>10}{'test R2':>10}{'fit s':>10}{'predict ms':>12}")
+    for precision, dtype in PRECISIONS.items():
+        X_train = preprocessor.transform(X_train_df).astype(dtype)
+        X_test = preprocessor.transform(X_test_df).astype(dtype)
+        y_fit = y_train.astype(dtype)
+
+        for name, model in ModelTrainer.get_models().items():
+            # CatBoost's get_params() only lists explicitly set params
+            if "random_state" in model.get_params() or type(model).__module__.startswith("catboost"):
+                model.set_params(random_state=42)
+
+            start = time.perf_counter()
+            model.fit(X_train, y_fit)
+            fit_seconds = time.perf_counter() - start
+
+            predict_seconds = best_of(lambda: model.predict(X_test))
+            score = r2_score(y_test, model.predict(X_test))
+            print(f"{name:<24}{precision:>10}{score:>10.4f}{fit_seconds:>10.3f}{predict_seconds * 1e3:>12.3f}")
+
+    print()
+    for precision, dtype in PRECISIONS.items():
+        encoder = FeatureEncoder.from_preprocessor(preprocessor, dtype=dtype)
+        seconds = best_of(lambda: encoder.transform(X_test_df))
+        print(f"FeatureEncoder.transform {precision}: {seconds * 1e3:.3f} ms for {len(X_test_df)} rows, "
+              f"{encoder.transform(X_test_df).nbytes / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
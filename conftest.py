@@ -0,0 +1,2 @@
+# Lets a plain `pytest` from the repository root import the `src` package:
+# pytest puts the directory of this conftest.py on sys.path.
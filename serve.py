@@ -0,0 +1,106 @@
+'''
+Production server for app.py: no debug mode, no reloader, no browser.
+
+The model, feature encoder and (if needed) preprocessor are loaded once in the
+master process before the workers are forked, so every worker starts warm and
+shares those pages copy-on-write instead of holding its own copy.
+
+    python serve.py [--host 0.0.0.0] [--port 5000] [--workers N] [--threads N] [--timeout 60]
+
+Runs gunicorn (pre-fork, one process per worker) where it is installed and
+falls back to waitress (one process, --threads threads), e.g. on Windows.
+'''
+import argparse
+import gc
+import os
+import sys
+import time
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve app.py with a production WSGI server")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 5000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="worker processes (gunicorn only)")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("WEB_THREADS", 1)),
+                        help="threads per worker (waitress uses at least 4)")
+    parser.add_argument("--timeout", type=int, default=int(os.environ.get("WEB_TIMEOUT", 60)),
+                        help="seconds before a stuck gunicorn worker is restarted")
+    return parser.parse_args(argv)
+
+
+def preload(app_module):
+    '''Loads every artifact a prediction needs into the shared registry.'''
+    try:
+        start = time.perf_counter()
+        app_module.predict_pipeline.get_model()
+        app_module.predict_pipeline.get_encoder()
+        logging.info(f"Preloaded artifacts in {time.perf_counter() - start:.3f}s: "
+                     f"{app_module.predict_pipeline.registry.stats()['artifacts']}")
+
+        # move everything loaded so far out of the garbage collector's reach, so
+        # collections in the workers don't write to (and un-share) those pages
+        gc.freeze()
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def run_gunicorn(app_module, args):
+    from gunicorn.app.base import BaseApplication
+
+    def post_fork(server, worker):
+        # threads are not copied by fork, so the master's micro-batcher is dead here
+        app_module.micro_batcher = app_module.create_micro_batcher()
+
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app_module.app
+
+    StandaloneApplication({
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "threads": args.threads,
+        "timeout": args.timeout,
+        "preload_app": True,
+        "post_fork": post_fork,
+    }).run()
+
+
+def run_waitress(app_module, args):
+    from waitress import serve
+
+    serve(app_module.app, host=args.host, port=args.port, threads=max(args.threads, 4))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    import app as app_module
+
+    preload(app_module)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        logging.info(f"gunicorn not available, serving with waitress on {args.host}:{args.port}")
+        run_waitress(app_module, args)
+    else:
+        logging.info(f"Serving with gunicorn on {args.host}:{args.port}, {args.workers} workers x {args.threads} threads")
+        run_gunicorn(app_module, args)
+
+
+if __name__ == "__main__":
+    main()
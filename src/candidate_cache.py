@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import GridSearchCV
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import CACHE_IGNORED_PARAMS, load_object, restore_model_threads, save_object, training_data_digest
+
+
+class CandidateCache:
+    '''
+    On-disk CV results of single hyperparameter candidates, one file per candidate
+    in cache_dir, content-addressed by the training data, the model class + library
+    version, the candidate's effective params (base params with the candidate's
+    applied) and the CV setup. A search only fits the candidates it has no entry
+    for, so editing a grid trains just the new or changed candidates.
+
+    The refit best estimator is stored in its candidate's entry as well, with
+    refit_params (e.g. the threading params limit_model_threads replaced) set on it.
+    '''
+
+    def __init__(self, cache_dir, estimator, X, y, cv=3, refit_params=None):
+        self.cache_dir = cache_dir
+        self.estimator = estimator
+        self.refit_params = refit_params
+        model_class = type(estimator)
+        library = sys.modules.get(model_class.__module__.split(".")[0])
+        self._base = {
+            "data": training_data_digest(X, y),
+            "class": f"{model_class.__module__}.{model_class.__qualname__}",
+            "library_version": getattr(library, "__version__", None),
+            "cv": f"KFold(n_splits={cv})",
+        }
+        self._params = estimator.get_params()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, params):
+        effective = {key: value for key, value in {**self._params, **params}.items() if key not in CACHE_IGNORED_PARAMS}
+        description = dict(self._base, params=sorted((key, repr(value)) for key, value in effective.items()))
+        key = hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, params):
+        '''The candidate's entry ({"params", "fold_scores", "estimator"}), or None.'''
+        path = self.path(params)
+        if not os.path.exists(path):
+            return None
+        entry = load_object(path)
+        os.utime(path)   # mark as recently used for purge_search_cache
+        return entry
+
+    def put(self, params, fold_scores, estimator=None):
+        save_object(self.path(params), {"params": params, "fold_scores": [float(score) for score in fold_scores],
+                                        "estimator": estimator})
+
+    def lookup(self, candidates):
+        '''Returns ({candidate index: cached fold scores}, [indices of candidates to fit]).'''
+        scores, missing = {}, []
+        for i, params in enumerate(candidates):
+            entry = self.get(params)
+            if entry is None:
+                missing.append(i)
+            else:
+                scores[i] = entry["fold_scores"]
+        self.hits += len(scores)
+        self.misses += len(missing)
+        return scores, missing
+
+    def fit_best(self, params, X, y):
+        '''The estimator refit on all of X with params, from the cache when stored.'''
+        entry = self.get(params)
+        if entry is not None and entry["estimator"] is not None:
+            return entry["estimator"]
+        estimator = clone(self.estimator).set_params(**params)
+        estimator.fit(X, y)
+        restore_model_threads(estimator, self.refit_params)
+        if entry is not None:
+            self.put(params, entry["fold_scores"], estimator)
+        return estimator
+
+
+def select_best(fold_scores):
+    '''(best index, mean CV scores); failed fits (NaN) rank last, ties go to the first candidate.'''
+    mean_scores = np.array([np.mean(scores) for scores in fold_scores], dtype=float)
+    return int(np.argmax(np.where(np.isnan(mean_scores), -np.inf, mean_scores))), mean_scores
+
+
+class CachedSearchCV:
+    '''
+    Search over an explicit candidate list (a ParameterGrid, or the ParameterSampler
+    draw RandomizedSearchCV would make) that reads each candidate's CV fold scores
+    from a CandidateCache and runs GridSearchCV only over the candidates it misses.
+    Same folds and scorer as GridSearchCV(cv=cv); exposes the attributes
+    evaluate_models relies on.
+    '''
+
+    def __init__(self, estimator, candidates, cache, cv=3, n_jobs=None):
+        self.estimator = estimator
+        self.candidates = candidates
+        self.cache = cache
+        self.cv = cv
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y):
+        try:
+            candidates = [dict(params) for params in self.candidates]
+            scores, missing = self.cache.lookup(candidates)
+
+            if missing:
+                # one single-point grid per missing candidate keeps cv_results_ in that order
+                grid = [{key: [value] for key, value in candidates[i].items()} for i in missing]
+                search = GridSearchCV(self.estimator, grid, cv=self.cv, n_jobs=self.n_jobs, refit=False)
+                search.fit(X, y)
+                for j, i in enumerate(missing):
+                    scores[i] = [search.cv_results_[f"split{fold}_test_score"][j] for fold in range(self.cv)]
+                    self.cache.put(candidates[i], scores[i])
+            logging.info(f"{type(self.estimator).__name__}: {len(candidates) - len(missing)} cached, "
+                         f"{len(missing)} fitted candidates")
+
+            best, mean_scores = select_best([scores[i] for i in range(len(candidates))])
+            self.cv_results_ = {"params": candidates, "mean_test_score": mean_scores}
+            self.best_index_ = best
+            self.best_params_ = candidates[best]
+            self.best_score_ = mean_scores[best]
+            self.n_fits_ = len(missing) * self.cv
+
+            self.best_estimator_ = self.cache.fit_best(self.best_params_, X, y)
+            return self
+
+        except Exception as e:
+            raise CustomException(e, sys)
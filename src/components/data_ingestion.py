@@ -22,30 +22,32 @@ from src.logger import logging
 ✅ logging: A custom logging module from src/logger.py.
 Used instead of print() to track program execution and debug more effectively.
 '''
-import pandas as pd
 
-from sklearn.model_selection import train_test_split
+from src.utils import FrameWriter, with_artifact_format, write_frame
+'''
+✅ FrameWriter / write_frame / with_artifact_format: helpers from src/utils.py that
+write a DataFrame (whole or chunk by chunk) as CSV, Parquet or Feather.
+'''
+from src.schema import READ_CSV_DTYPES, apply_schema, memory_usage_report
+'''
+✅ READ_CSV_DTYPES / apply_schema / memory_usage_report: the dataset's column schema
+from src/schema.py, used to parse and validate columns into compact dtypes.
+'''
+import numpy as np
+import pandas as pd
 
 from dataclasses import dataclass
+from typing import Optional
 '''
 ✅ dataclass: A Python decorator that automatically creates init (constructor), 
 repr, and other methods for classes. Perfect for configuration and parameter storage.
 '''
 
 # ========================== PIPELINE COMPONENTS ==========================
-
-from src.components.data_transformation import DataTransformation
-from src.components.data_transformation import DataTransformationConfig
 '''
-✅ These two handle the data preprocessing step — 
-null removal, encoding, scaling, and converting data to arrays.
-'''
-
-from src.components.model_trainer import ModelTrainerConfig
-from src.components.model_trainer import ModelTrainer
-'''
-✅ These handle the final step — training the machine learning model
-and evaluating its performance.
+✅ DataTransformation and ModelTrainer (and with them sklearn, XGBoost and CatBoost)
+are imported inside the `__main__` block below, so importing this module just to
+ingest data does not load every ML library.
 '''
 
 # ========================== STEP 1: DATA CONFIGURATION ==========================
@@ -68,6 +70,67 @@ class DataIngestionConfig:
     test_data_path: str = os.path.join('artifacts', "test.csv")
     raw_data_path: str = os.path.join('artifacts', "data.csv")
 
+    source_data_path: str = os.path.join('notebook', 'data', 'stud.csv')
+    test_size: float = 0.2
+    random_state: int = 42
+
+    artifact_format: str = "csv"
+    '''
+    ✅ artifact_format: file format of data/train/test artifacts.
+    - "csv" ➜ original behaviour
+    - "parquet" / "feather" ➜ columnar, categorical columns stored as pandas categories;
+      DataTransformation reads whichever format was written (by file extension)
+    '''
+
+    save_checkpoints: bool = False
+    '''
+    ✅ save_checkpoints: only used with initiate_data_ingestion(return_frames=True).
+    - False ➜ hand the DataFrames straight to the next stage, nothing written to disk
+    - True ➜ also write data/train/test artifacts as a checkpoint
+    '''
+
+    chunk_size: Optional[int] = None
+    '''
+    ✅ chunk_size: rows per chunk for streaming ingestion.
+    - None ➜ read the whole file and use train_test_split (original behaviour)
+    - e.g. 1_000_000 ➜ read in chunks, split each row by a seeded hash of its row
+      number and append to the output files, so peak memory is one chunk
+    '''
+
+    def artifact_paths(self):
+        '''
+        ✅ (raw, train, test) paths with the extension of artifact_format,
+        e.g. 'artifacts/train.csv' ➜ 'artifacts/train.parquet'.
+        '''
+        return tuple(
+            with_artifact_format(path, self.artifact_format)
+            for path in (self.raw_data_path, self.train_data_path, self.test_data_path)
+        )
+
+def _splitmix64(value):
+    '''
+    ✅ 64-bit integer mix (SplitMix64 finalizer): turns nearby seeds like 42 and 43
+    into unrelated 64-bit values.
+    '''
+    mask = (1 << 64) - 1
+    value = (value + 0x9E3779B97F4A7C15) & mask
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & mask
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & mask
+    return value ^ (value >> 31)
+
+def hash_split_mask(start_row, n_rows, test_size, random_state):
+    '''
+    ✅ Deterministic train/test assignment for rows start_row .. start_row + n_rows - 1.
+    Each row's global row number is XORed with a value mixed from random_state and
+    then hashed, so the split does not depend on the chunk size, the same seed always
+    gives the same split and another seed gives another one. Returns a boolean
+    array: True ➜ test row.
+    '''
+    # pd.util.hash_array ignores hash_key for numeric arrays, so the seed goes into the values
+    row_numbers = np.arange(start_row, start_row + n_rows, dtype=np.uint64)
+    hashes = pd.util.hash_array(row_numbers ^ np.uint64(_splitmix64(random_state)))
+    return (hashes % np.uint64(1_000_000)) < np.uint64(round(test_size * 1_000_000))
+
 # ========================== STEP 2: DATA INGESTION CLASS ==========================
 
 class DataIngestion:
@@ -78,7 +141,7 @@ class DataIngestion:
         '''
         self.ingestion_config = DataIngestionConfig()
 
-    def initiate_data_ingestion(self):
+    def initiate_data_ingestion(self, return_frames=False):
         '''
         ✅ Main method to perform:
         - Reading the CSV file
@@ -86,21 +149,43 @@ class DataIngestion:
         - Splitting the data
         - Saving train/test datasets
         - Logging each step
+
+        ✅ return_frames=True:
+        - Returns the (train_set, test_set) DataFrames instead of file paths,
+          so DataTransformation can use them without a write/parse round trip
+        - Files are only written when ingestion_config.save_checkpoints is True
         '''
         logging.info("Entered the data ingestion method or component")
 
+        if self.ingestion_config.chunk_size:
+            if return_frames:
+                raise ValueError("Streaming ingestion (chunk_size) writes to disk; use return_frames=False")
+            return self.initiate_streaming_ingestion()
+
+        write_artifacts = not return_frames or self.ingestion_config.save_checkpoints
+
         try:
-            df = pd.read_csv('notebook\data\stud.csv')
+            df = apply_schema(pd.read_csv(self.ingestion_config.source_data_path, dtype=READ_CSV_DTYPES))
             '''
             ✅ pd.read_csv(): Reads a CSV file into a pandas DataFrame.
-            - 'notebook\\data\\stud.csv' is the relative path to the data.
+            - source_data_path ➜ 'notebook/data/stud.csv', the relative path to the data.
             - df will hold the full dataset in a table format.
+
+            ✅ apply_schema() (src/schema.py):
+            - categorical columns ➜ pandas 'category' restricted to their known values
+            - scores ➜ uint8 instead of int64
+            - raises if any value is outside the declared domain
             '''
 
+            memory_usage_report("ingestion", raw=df)
+
             logging.info('Read the dataset as dataframe')
 
             # 🔽 CREATE THE ARTIFACT FOLDER
-            os.makedirs(os.path.dirname(self.ingestion_config.train_data_path), exist_ok=True)
+            raw_data_path, train_data_path, test_data_path = self.ingestion_config.artifact_paths()
+
+            if write_artifacts:
+                os.makedirs(os.path.dirname(train_data_path), exist_ok=True)
             '''
             ✅ os.path.dirname(path):
             - Takes a full file path and returns only the folder path.
@@ -115,18 +200,23 @@ class DataIngestion:
             '''
 
             # 🔽 SAVE THE RAW DATA TO A CSV FILE FOR BACKUP
-            df.to_csv(self.ingestion_config.raw_data_path, index=False, header=True)
+            if write_artifacts:
+                write_frame(df, raw_data_path)
             '''
-            ✅ df.to_csv(): Saves a DataFrame to a CSV file.
-            - raw_data_path ➜ 'artifacts/data.csv'
-            - index=False ➜ Don't write row numbers
-            - header=True ➜ Include column names
+            ✅ write_frame(): Saves a DataFrame in the format given by the file extension.
+            - raw_data_path ➜ 'artifacts/data.csv' (or .parquet / .feather)
+            - csv is written with index=False, header=True as before
             '''
 
             logging.info("Train test split initiated")
 
             # 🔽 SPLIT THE DATASET INTO TRAINING AND TESTING
-            train_set, test_set = train_test_split(df, test_size=0.2, random_state=42)
+            from sklearn.model_selection import train_test_split  # only this path needs sklearn
+            train_set, test_set = train_test_split(
+                df,
+                test_size=self.ingestion_config.test_size,
+                random_state=self.ingestion_config.random_state,
+            )
             '''
             ✅ train_test_split():
             - Randomly splits data into training and testing sets.
@@ -134,17 +224,24 @@ class DataIngestion:
             - random_state=42 ➜ Ensures same split every time (reproducibility)
             '''
 
-            # 🔽 SAVE TRAINING DATA TO A FILE
-            train_set.to_csv(self.ingestion_config.train_data_path, index=False, header=True)
+            if write_artifacts:
+                # 🔽 SAVE TRAINING DATA TO A FILE
+                write_frame(train_set, train_data_path)
 
-            # 🔽 SAVE TESTING DATA TO A FILE
-            test_set.to_csv(self.ingestion_config.test_data_path, index=False, header=True)
+                # 🔽 SAVE TESTING DATA TO A FILE
+                write_frame(test_set, test_data_path)
 
             logging.info("Ingestion of the data is completed")
 
+            if return_frames:
+                return (
+                    train_set.reset_index(drop=True),
+                    test_set.reset_index(drop=True)
+                )
+
             return (
-                self.ingestion_config.train_data_path,
-                self.ingestion_config.test_data_path
+                train_data_path,
+                test_data_path
             )
             '''
             ✅ Return the paths of train.csv and test.csv
@@ -158,6 +255,50 @@ class DataIngestion:
             '''
             raise CustomException(e, sys)
 
+    def initiate_streaming_ingestion(self):
+        '''
+        ✅ Chunked version of initiate_data_ingestion for sources larger than memory:
+        - Reads the source chunk_size rows at a time
+        - Assigns every row to train/test with hash_split_mask (seeded by random_state)
+        - Appends each chunk to the data/train/test artifacts as it goes
+        '''
+        logging.info(f"Entered streaming data ingestion with chunk_size={self.ingestion_config.chunk_size}")
+
+        try:
+            config = self.ingestion_config
+            raw_data_path, train_data_path, test_data_path = config.artifact_paths()
+            os.makedirs(os.path.dirname(train_data_path), exist_ok=True)
+
+            rows_seen = 0
+            train_rows = 0
+            # the first chunk creates/overwrites each file, later chunks append
+            with FrameWriter(raw_data_path) as raw_writer, \
+                    FrameWriter(train_data_path) as train_writer, \
+                    FrameWriter(test_data_path) as test_writer:
+                for chunk in pd.read_csv(config.source_data_path, chunksize=config.chunk_size, dtype=READ_CSV_DTYPES):
+                    chunk = apply_schema(chunk)
+                    if rows_seen == 0:
+                        memory_usage_report("streaming ingestion, per chunk", chunk=chunk)
+
+                    is_test = hash_split_mask(rows_seen, len(chunk), config.test_size, config.random_state)
+
+                    raw_writer.write(chunk)
+                    train_writer.write(chunk[~is_test])
+                    test_writer.write(chunk[is_test])
+
+                    rows_seen += len(chunk)
+                    train_rows += int((~is_test).sum())
+
+            logging.info(f"Streaming ingestion completed: {rows_seen} rows, {train_rows} train / {rows_seen - train_rows} test")
+
+            return (
+                train_data_path,
+                test_data_path
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
 # ========================== STEP 3–5: MAIN EXECUTION BLOCK ==========================
 
 if __name__ == "__main__":
@@ -166,10 +307,25 @@ if __name__ == "__main__":
     It won’t run if this file is imported elsewhere.
     '''
 
+    from src.components.data_transformation import DataTransformation
+    '''
+    ✅ Handles the data preprocessing step —
+    null removal, encoding, scaling, and converting data to arrays.
+    '''
+
+    from src.components.model_trainer import ModelTrainer
+    '''
+    ✅ Handles the final step — training the machine learning model
+    and evaluating its performance.
+    '''
+
     # 🔽 STEP 3: Run Data Ingestion
     obj = DataIngestion()  # Create an instance of the DataIngestion class
     # obj.initiate_data_ingestion()
-    train_data, test_data = obj.initiate_data_ingestion()  # Start ingestion, get file paths
+    # Start ingestion; streaming ingestion hands over file paths, otherwise the
+    # train/test DataFrames are passed on in memory (set save_checkpoints to also write them)
+    in_memory = not obj.ingestion_config.chunk_size
+    train_data, test_data = obj.initiate_data_ingestion(return_frames=in_memory)
 
     # 🔽 STEP 4: Data Transformation
     data_transformation = DataTransformation()  # Create instance of transformation class
@@ -178,7 +334,7 @@ if __name__ == "__main__":
     ✅ This step processes the train and test data:
     - Handles missing values, encoding, feature scaling
     - Converts data into NumPy arrays suitable for ML models
-    - Returns: train_arr, test_arr, and preprocessing object (if needed)
+    - Returns: (X_train, y_train), (X_test, y_test) and the preprocessor path
     '''
 
     # 🔽 STEP 5: Model Training
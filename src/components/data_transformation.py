@@ -11,10 +11,26 @@ from sklearn.preprocessing import OneHotEncoder,StandardScaler
 
 from src.exception import CustomException
 from src.logger import logging 
-from src.utils import save_object
+from src.utils import save_object, file_sha256, read_frame
+from src.components.feature_encoder import FeatureEncoder
+from src.schema import CATEGORICAL_COLUMNS, NUMERICAL_COLUMNS, TARGET_COLUMN, apply_schema, memory_usage_report
 
 class DataTransformationConfig:
     preprocessor_obj_file_path = os.path.join('artifacts','preprocessor.pkl')
+    feature_encoder_file_path = os.path.join('artifacts','feature_encoder.pkl')
+    # "float32" or "float64": dtype of the training matrices AND of the exported FeatureEncoder's
+    # output, so serving feeds the model the same precision it was trained on
+    precision = "float32"
+    # transformed matrices: written once into preallocated arrays, optionally np.memmap-backed .npy files
+    use_memmap = False
+    train_features_file_path = os.path.join('artifacts','train_X.npy')
+    train_target_file_path = os.path.join('artifacts','train_y.npy')
+    test_features_file_path = os.path.join('artifacts','test_X.npy')
+    test_target_file_path = os.path.join('artifacts','test_y.npy')
+    # rows transformed per preprocessor.transform call while filling the arrays
+    transform_chunk_size = 100_000
+
+PRECISIONS = {"float32": np.float32, "float64": np.float64}
 
 class DataTransformation:
     def __init__(self):
@@ -26,14 +42,8 @@ class DataTransformation:
         
         '''
         try:
-            numerical_columns = ["writing_score", "reading_score"]
-            categorical_columns = [
-                "gender",
-                "race_ethnicity",
-                "parental_level_of_education",
-                "lunch",
-                "test_preparation_course",
-            ]
+            numerical_columns = list(NUMERICAL_COLUMNS)
+            categorical_columns = list(CATEGORICAL_COLUMNS)
 
             num_pipeline= Pipeline(
                 steps=[
@@ -71,38 +81,82 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e,sys) 
         
+    @property
+    def feature_dtype(self):
+        precision=self.data_transformation_config.precision
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {list(PRECISIONS)}")
+        return PRECISIONS[precision]
+
+    def _allocate(self,file_path,shape):
+        config=self.data_transformation_config
+        if config.use_memmap:
+            os.makedirs(os.path.dirname(file_path),exist_ok=True)
+            # a regular .npy file, so later stages can np.load(..., mmap_mode="r") it
+            return np.lib.format.open_memmap(file_path,mode="w+",dtype=self.feature_dtype,shape=shape)
+        return np.empty(shape,dtype=self.feature_dtype)
+
+    def _transform_into(self,preprocessing_obj,input_df,file_path):
+        '''
+        Transforms input_df chunk by chunk straight into one preallocated
+        feature matrix, so no full-size temporary or concatenated copy is made.
+        '''
+        n_features=len(preprocessing_obj.get_feature_names_out())
+        out=self._allocate(file_path,(len(input_df),n_features))
+        step=self.data_transformation_config.transform_chunk_size
+        for start in range(0,len(input_df),step):
+            out[start:start+step]=preprocessing_obj.transform(input_df.iloc[start:start+step])
+        return out
+
     def initiate_data_transformation(self,train_path,test_path):
+        '''
+        train_path / test_path: artifact paths written by DataIngestion, or the
+        train/test DataFrames themselves (DataIngestion(return_frames=True))
+
+        Returns ((X_train, y_train), (X_test, y_test), preprocessor_path); the
+        arrays use the configured precision and are memmap-backed .npy files when use_memmap is set.
+        '''
 
         try:
-            train_df=pd.read_csv(train_path)
-            test_df=pd.read_csv(test_path)
+            # in-memory hand-off, or csv / parquet / feather, whichever DataIngestion wrote
+            train_df=train_path if isinstance(train_path,pd.DataFrame) else read_frame(train_path)
+            test_df=test_path if isinstance(test_path,pd.DataFrame) else read_frame(test_path)
+
+            # compact dtypes + domain validation (a no-op cast if ingestion already applied it)
+            train_df=apply_schema(train_df)
+            test_df=apply_schema(test_df)
 
             logging.info("Read train and test data completed")
+            memory_usage_report("transformation input", train_df=train_df, test_df=test_df)
 
             logging.info("Obtaining preprocessing object")
 
             preprocessing_obj=self.get_data_transformer_object()
 
-            target_column_name="math_score"
-            numerical_columns = ["writing_score", "reading_score"]
+            target_column_name=TARGET_COLUMN
 
-            input_feature_train_df=train_df.drop(columns=[target_column_name],axis=1)
+            input_feature_train_df=train_df.drop(columns=[target_column_name])
             target_feature_train_df=train_df[target_column_name]
 
-            input_feature_test_df=test_df.drop(columns=[target_column_name],axis=1)
+            input_feature_test_df=test_df.drop(columns=[target_column_name])
             target_feature_test_df=test_df[target_column_name]
 
             logging.info(
                 f"Applying preprocessing object on training dataframe and testing dataframe."
             )
 
-            input_feature_train_arr=preprocessing_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr=preprocessing_obj.transform(input_feature_test_df)
+            preprocessing_obj.fit(input_feature_train_df)
+
+            config=self.data_transformation_config
+            X_train=self._transform_into(preprocessing_obj,input_feature_train_df,config.train_features_file_path)
+            y_train=self._allocate(config.train_target_file_path,(len(target_feature_train_df),))
+            y_train[:]=target_feature_train_df.to_numpy()
+
+            X_test=self._transform_into(preprocessing_obj,input_feature_test_df,config.test_features_file_path)
+            y_test=self._allocate(config.test_target_file_path,(len(target_feature_test_df),))
+            y_test[:]=target_feature_test_df.to_numpy()
 
-            train_arr = np.c_[
-                input_feature_train_arr, np.array(target_feature_train_df)
-            ]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+            memory_usage_report("transformation output", X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test)
 
             logging.info(f"Saved preprocessing object.")
 
@@ -113,9 +167,21 @@ class DataTransformation:
 
             )
 
+            # flat NumPy version of the same preprocessor, used by PredictPipeline
+            save_object(
+                file_path=self.data_transformation_config.feature_encoder_file_path,
+                obj=FeatureEncoder.from_preprocessor(
+                    preprocessing_obj,
+                    source_sha256=file_sha256(self.data_transformation_config.preprocessor_obj_file_path),
+                    dtype=self.feature_dtype,
+                ),
+            )
+
+            logging.info(f"Saved compiled feature encoder.")
+
             return (
-                train_arr,
-                test_arr,
+                (X_train, y_train),
+                (X_test, y_test),
                 self.data_transformation_config.preprocessor_obj_file_path,
             )
         except Exception as e:
@@ -0,0 +1,171 @@
+import sys
+
+import numpy as np
+
+from src.exception import CustomException
+
+
+class FeatureEncoder:
+    '''
+    Plain-Python/NumPy replacement for the fitted ColumnTransformer built in
+    DataTransformation.get_data_transformer_object.
+
+    The imputer fill values, scaler constants and one-hot category positions are
+    read once from the fitted preprocessor, so records can be turned into the
+    model-ready features without walking the sklearn object graph or going
+    through sparse matrices: transform_record() for a single dict/tuple,
+    transform() for a whole batch. Output columns follow the ColumnTransformer
+    layout (numerical block, then one one-hot block per categorical column).
+
+    DataTransformation saves one next to preprocessor.pkl as feature_encoder.pkl;
+    source_sha256 is the hash of the preprocessor.pkl it was compiled from and
+    dtype the training precision, which both transforms output.
+    '''
+
+    # encoders pickled before the precision setting existed produce float64
+    dtype = np.dtype(np.float64)
+
+    def __init__(self, input_columns, numerical_columns, num_fill, num_mean, num_scale,
+                 categorical_columns, cat_fill, category_lookup, hot_values, source_sha256=None,
+                 dtype=np.float64):
+        self.input_columns = list(input_columns)
+        self.numerical_columns = list(numerical_columns)
+        self.num_fill = np.asarray(num_fill, dtype=float)
+        self.num_mean = np.asarray(num_mean, dtype=float)
+        self.num_scale = np.asarray(num_scale, dtype=float)
+        self.categorical_columns = list(categorical_columns)
+        self.cat_fill = list(cat_fill)
+        self.category_lookup = [dict(lookup) for lookup in category_lookup]   # category -> output column
+        self.hot_values = np.asarray(hot_values, dtype=float)                 # value written at a hot column
+        self.n_features = len(self.numerical_columns) + len(self.hot_values)
+        self.source_sha256 = source_sha256
+        self.dtype = np.dtype(dtype)
+
+        # sorted category arrays + their output columns, for vectorized lookups in transform()
+        self._sorted_categories = []
+        self._sorted_positions = []
+        for lookup in self.category_lookup:
+            categories = np.asarray([str(category) for category in lookup], dtype=str)
+            positions = np.asarray(list(lookup.values()), dtype=np.intp)
+            order = np.argsort(categories)
+            self._sorted_categories.append(categories[order])
+            self._sorted_positions.append(positions[order])
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor, input_columns=None, source_sha256=None, dtype=np.float64):
+        try:
+            steps = {}
+            for name, pipeline, columns in preprocessor.transformers_:
+                if name == "remainder":
+                    continue
+                steps[name] = (dict(pipeline.named_steps), list(columns))
+
+            num_steps, numerical_columns = steps["num_pipeline"]
+            cat_steps, categorical_columns = steps["cat_pipelines"]
+
+            num_imputer, num_scaler = num_steps["imputer"], num_steps["scaler"]
+            num_mean = num_scaler.mean_ if num_scaler.with_mean else np.zeros(len(numerical_columns))
+            num_scale = num_scaler.scale_ if num_scaler.with_std else np.ones(len(numerical_columns))
+
+            cat_imputer, encoder, cat_scaler = cat_steps["imputer"], cat_steps["one_hot_encoder"], cat_steps["scaler"]
+            if encoder.drop is not None or cat_scaler.with_mean:
+                raise ValueError("Only a full one-hot encoding followed by StandardScaler(with_mean=False) can be compiled")
+
+            n_hot = sum(len(categories) for categories in encoder.categories_)
+            cat_scale = cat_scaler.scale_ if cat_scaler.with_std else np.ones(n_hot)
+
+            category_lookup = []
+            position = len(numerical_columns)
+            for categories in encoder.categories_:
+                category_lookup.append({category: position + i for i, category in enumerate(categories)})
+                position += len(categories)
+
+            if input_columns is None:
+                input_columns = getattr(preprocessor, "feature_names_in_", categorical_columns + numerical_columns)
+
+            return cls(
+                input_columns=input_columns,
+                numerical_columns=numerical_columns,
+                num_fill=num_imputer.statistics_,
+                num_mean=num_mean,
+                num_scale=num_scale,
+                categorical_columns=categorical_columns,
+                cat_fill=cat_imputer.statistics_,
+                category_lookup=category_lookup,
+                hot_values=1.0 / np.asarray(cat_scale, dtype=float),
+                source_sha256=source_sha256,
+                dtype=dtype,
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def transform_record(self, record):
+        '''
+        record: dict keyed by column name, or a tuple/list in input_columns order
+        (gender, race_ethnicity, parental_level_of_education, lunch,
+        test_preparation_course, reading_score, writing_score).
+        Returns a 1-D array of length n_features in self.dtype.
+        '''
+        if not isinstance(record, dict):
+            record = dict(zip(self.input_columns, record))
+
+        row = np.zeros(self.n_features, dtype=self.dtype)
+
+        for j, column in enumerate(self.numerical_columns):
+            value = record.get(column)
+            value = self.num_fill[j] if value is None or value != value else float(value)
+            row[j] = (value - self.num_mean[j]) / self.num_scale[j]
+
+        offset = len(self.numerical_columns)
+        for column, lookup, fill in zip(self.categorical_columns, self.category_lookup, self.cat_fill):
+            value = record.get(column)
+            if value is None or value != value:
+                value = fill
+            index = lookup.get(value)
+            if index is None:
+                raise ValueError(f"Found unknown category {value!r} in column {column!r}")
+            row[index] = self.hot_values[index - offset]
+
+        return row
+
+    def transform(self, X):
+        '''
+        X: DataFrame (or any mapping of column name -> 1-D array-like) holding the raw columns.
+        Returns a dense (n_rows, n_features) array in self.dtype.
+        '''
+        try:
+            n_rows = len(X[self.input_columns[0]])
+            out = np.zeros((n_rows, self.n_features), dtype=self.dtype)
+            n_num = len(self.numerical_columns)
+
+            num = np.column_stack([np.asarray(X[column], dtype=float) for column in self.numerical_columns])
+            num = np.where(np.isnan(num), self.num_fill, num)
+            out[:, :n_num] = (num - self.num_mean) / self.num_scale
+
+            rows = np.arange(n_rows)
+            for column, fill, categories, positions in zip(
+                self.categorical_columns, self.cat_fill, self._sorted_categories, self._sorted_positions
+            ):
+                values = np.asarray(X[column], dtype=object)
+                missing = np.equal(values, None) | (values != values)
+                if missing.any():
+                    values = np.where(missing, fill, values)
+                values = values.astype(str)
+
+                index = np.searchsorted(categories, values).clip(max=len(categories) - 1)
+                unknown = categories[index] != values
+                if unknown.any():
+                    raise ValueError(f"Found unknown categories {sorted(set(values[unknown].tolist()))} in column {column!r}")
+
+                hot = positions[index]
+                out[rows, hot] = self.hot_values[hot - n_num]
+
+            return out
+
+        except ValueError:
+            # unknown categories are bad input, raised as is (like transform_record)
+            raise
+        except Exception as e:
+            raise CustomException(e, sys)
+
@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from src.exception import CustomException
+from src.logger import logging
+from src.schema import CATEGORICAL_COLUMNS, CATEGORY_DOMAINS, INPUT_SCORE_COLUMNS, SCORE_RANGE
+from src.utils import file_sha256, save_json
+
+
+@dataclass
+class LookupTableConfig:
+    table_file_path: str = os.path.join("artifacts", "prediction_table.npy")
+    # float16 keeps the 2.4M entries at ~4.9 MB (error <= 0.03 on a 0-100 score); float32 is exact for float32 models
+    dtype: str = "float16"
+    batch_size: int = 262_144
+
+
+def metadata_path_of(table_file_path):
+    return os.path.splitext(table_file_path)[0] + ".json"
+
+
+class LookupTable:
+    '''
+    The model's prediction for every point of the input domain: one axis per
+    categorical column (its CATEGORY_DOMAINS values) and one per input score (0-100),
+    in src.schema's FEATURE_COLUMNS order,
+    so a record is answered by indexing instead of running the model.
+
+    `values` is the memory-mapped .npy written by build_lookup_table(); the
+    metadata next to it records the model_version (PredictPipeline.model_version())
+    the table was computed from and the table's own sha256, so a reader never pairs
+    a table with metadata from another build. Inputs outside the table (missing
+    values, non-integer scores) get no index and must go to the model.
+    '''
+
+    def __init__(self, values, metadata):
+        self.values = values
+        self.metadata = metadata
+        self.model_version = metadata["model_version"]
+        self.domains = [list(domain) for domain in metadata["domains"]]
+        self.low, self.high = metadata["score_range"]
+        self._category_index = [{value: i for i, value in enumerate(domain)} for domain in self.domains]
+        self._flat = values.reshape(-1)
+
+    def index_record(self, values):
+        '''values: the seven raw fields in table order. Returns the table index tuple, or None.'''
+        index = []
+        for lookup, value in zip(self._category_index, values[:len(self._category_index)]):
+            position = lookup.get(value)
+            if position is None:
+                return None
+            index.append(position)
+        for value in values[len(self._category_index):]:
+            try:
+                score = float(value)
+            except (TypeError, ValueError):
+                return None
+            if not (self.low <= score <= self.high) or score != int(score):
+                return None
+            index.append(int(score) - self.low)
+        return tuple(index)
+
+    def lookup_record(self, values):
+        index = self.index_record(values)
+        return None if index is None else float(self.values[index])
+
+    def lookup_frame(self, df):
+        '''Returns (predictions as float64, indices of the rows the table cannot answer).'''
+        n_rows = len(df)
+        valid = np.ones(n_rows, dtype=bool)
+        axes = []
+        for column, domain in zip(CATEGORICAL_COLUMNS, self.domains):
+            codes = pd.Categorical(df[column], categories=domain).codes.astype(np.intp)
+            valid &= codes >= 0
+            axes.append(codes)
+        for column in INPUT_SCORE_COLUMNS:
+            scores = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+            valid &= (scores >= self.low) & (scores <= self.high) & (scores == np.floor(scores))
+            axes.append(np.where(valid, scores - self.low, 0).astype(np.intp))
+
+        axes = [np.where(valid, axis, 0) for axis in axes]
+        preds = self._flat[np.ravel_multi_index(axes, self.values.shape)].astype(np.float64)
+        return preds, np.flatnonzero(~valid)
+
+
+def build_lookup_table(pipeline, config=None):
+    '''
+    Evaluates pipeline's current model over the whole input domain in vectorized
+    batches (FeatureEncoder.transform + model.predict) and writes the table
+    (.npy, table_file_path) plus its metadata (.json next to it). Returns the metadata.
+    '''
+    try:
+        config = config if config is not None else LookupTableConfig()
+        model_version = pipeline.model_version()
+        model = pipeline.get_model()
+        encoder = pipeline.get_encoder()
+
+        domains = [list(CATEGORY_DOMAINS[column]) for column in CATEGORICAL_COLUMNS]
+        low, high = SCORE_RANGE
+        scores = np.arange(low, high + 1, dtype=float)
+        shape = tuple(len(domain) for domain in domains) + (len(scores),) * len(INPUT_SCORE_COLUMNS)
+        size = int(np.prod(shape))
+        domain_arrays = [np.asarray(domain, dtype=object) for domain in domains]
+
+        start = time.perf_counter()
+        tmp_path = f"{config.table_file_path}.{os.getpid()}.tmp.npy"
+        os.makedirs(os.path.dirname(config.table_file_path), exist_ok=True)
+        table = open_memmap(tmp_path, mode="w+", dtype=np.dtype(config.dtype), shape=shape)
+        flat = table.reshape(-1)
+
+        max_abs_error = 0.0
+        for batch_start in range(0, size, config.batch_size):
+            batch = np.arange(batch_start, min(batch_start + config.batch_size, size))
+            axes = np.unravel_index(batch, shape)
+            columns = {column: values[axis] for column, values, axis in zip(CATEGORICAL_COLUMNS, domain_arrays, axes)}
+            columns.update({column: scores[axis] for column, axis in zip(INPUT_SCORE_COLUMNS, axes[len(domains):])})
+
+            preds = np.asarray(model.predict(encoder.transform(columns)), dtype=np.float64)
+            flat[batch] = preds
+            max_abs_error = max(max_abs_error, float(np.abs(flat[batch].astype(np.float64) - preds).max()))
+
+        table.flush()
+        del table, flat
+        os.replace(tmp_path, config.table_file_path)
+
+        metadata = {
+            "model_version": model_version,
+            "table_sha256": file_sha256(config.table_file_path),
+            "columns": CATEGORICAL_COLUMNS + INPUT_SCORE_COLUMNS,
+            "domains": domains,
+            "score_range": [low, high],
+            "shape": list(shape),
+            "dtype": config.dtype,
+            "max_abs_error": max_abs_error,
+            "build_seconds": round(time.perf_counter() - start, 3),
+        }
+        save_json(metadata_path_of(config.table_file_path), metadata)
+        logging.info(f"Lookup table: {size} predictions in {metadata['build_seconds']}s, "
+                     f"{os.path.getsize(config.table_file_path) / 1024 ** 2:.1f} MB, max abs error {max_abs_error:.4f}")
+        return metadata
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    # offline step: run after training, from the repository root
+    from src.pipeline.predict_pipeline import PredictPipeline
+
+    print(build_lookup_table(PredictPipeline()))
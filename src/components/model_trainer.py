@@ -1,51 +1,81 @@
 import os
 import sys
 from dataclasses import dataclass
+from typing import Optional
 
-from catboost import CatBoostRegressor
-from sklearn.ensemble import (
-    AdaBoostRegressor,
-    GradientBoostingRegressor,
-    RandomForestRegressor,
-)
-from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.tree import DecisionTreeRegressor
-from xgboost import XGBRegressor
 
 from src.exception import CustomException
 from src.logger import logging
 
-from src.utils import save_object,evaluate_models
+from src.components.native_model import export_native_model
+from src.utils import save_object,save_json,evaluate_models,purge_search_cache
 
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path=os.path.join("artifacts","model.pkl")
+    model_report_file_path=os.path.join("artifacts","model_report.json")
+    # XGBoost / CatBoost winners are also saved in their native format (model.ubj / model.cbm)
+    native_model_manifest_path=os.path.join("artifacts","model_native.json")
+    # joblib compression for model.pkl; 0 loads fastest (and keeps plain arrays memory-mappable)
+    model_compress: int = 0
+    # total workers for the model search: 1 = sequential, -1 = all cores
+    n_jobs: int = 1
+    # "grid" (exhaustive), "random" or "halving"; budget = max candidates per model (None = whole grid)
+    search_strategy: str = "grid"
+    search_budget: Optional[int] = None
+    # grid strategy: train each boosting/forest candidate once at the largest n_estimators/iterations
+    # and score the smaller sizes from staged predictions instead of refitting them
+    staged_boosting: bool = True
+    # CV scores per candidate keyed by data/model class/params hash (plus the refit winners),
+    # reused across runs so a changed grid only trains its new candidates (None disables)
+    model_cache_dir: Optional[str] = os.path.join("artifacts","model_cache")
+    # cache entries (one per candidate) kept after each run, least recently used dropped first (None = no limit)
+    model_cache_max_entries: Optional[int] = 5000
+    model_cache_max_age_days: Optional[float] = 30
 
 class ModelTrainer:
     def __init__(self):
         self.model_trainer_config=ModelTrainerConfig()
 
 
+    @staticmethod
+    def _split_features_target(array):
+        # (X, y) pair from DataTransformation, or a legacy combined array with the target last
+        if isinstance(array,tuple):
+            return array
+        return array[:,:-1],array[:,-1]
+
+    @staticmethod
+    def get_models():
+        # model libraries are imported here, not at module load, so importing the
+        # trainer (or anything that imports it) stays cheap until training starts
+        from catboost import CatBoostRegressor
+        from sklearn.ensemble import (
+            AdaBoostRegressor,
+            GradientBoostingRegressor,
+            RandomForestRegressor,
+        )
+        from sklearn.linear_model import LinearRegression
+        from sklearn.tree import DecisionTreeRegressor
+        from xgboost import XGBRegressor
+
+        return {
+            "Random Forest": RandomForestRegressor(),
+            "Decision Tree": DecisionTreeRegressor(),
+            "Gradient Boosting": GradientBoostingRegressor(),
+            "Linear Regression": LinearRegression(),
+            "XGBRegressor": XGBRegressor(),
+            "CatBoosting Regressor": CatBoostRegressor(verbose=False),
+            "AdaBoost Regressor": AdaBoostRegressor(),
+        }
+
     def initiate_model_trainer(self,train_array,test_array):
         try:
             logging.info("Split training and test input data")
-            X_train,y_train,X_test,y_test=(
-                train_array[:,:-1],
-                train_array[:,-1],
-                test_array[:,:-1],
-                test_array[:,-1]
-            )
-            models = {
-                "Random Forest": RandomForestRegressor(),
-                "Decision Tree": DecisionTreeRegressor(),
-                "Gradient Boosting": GradientBoostingRegressor(),
-                "Linear Regression": LinearRegression(),
-                "XGBRegressor": XGBRegressor(),
-                "CatBoosting Regressor": CatBoostRegressor(verbose=False),
-                "AdaBoost Regressor": AdaBoostRegressor(),
-            }
+            X_train,y_train=self._split_features_target(train_array)
+            X_test,y_test=self._split_features_target(test_array)
+            models = self.get_models()
             params={
                 "Decision Tree": {
                     'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
@@ -84,8 +114,16 @@ class ModelTrainer:
                 
             }
 
-            model_report:dict=evaluate_models(X_train=X_train,y_train=y_train,X_test=X_test,y_test=y_test,
-                                             models=models,param=params)
+            model_report,fitted_models,search_info=evaluate_models(X_train=X_train,y_train=y_train,X_test=X_test,y_test=y_test,
+                                             models=models,param=params,
+                                             n_jobs=self.model_trainer_config.n_jobs,
+                                             search_strategy=self.model_trainer_config.search_strategy,
+                                             search_budget=self.model_trainer_config.search_budget,
+                                             staged_boosting=self.model_trainer_config.staged_boosting,
+                                             cache_dir=self.model_trainer_config.model_cache_dir)
+            purge_search_cache(self.model_trainer_config.model_cache_dir,
+                               max_entries=self.model_trainer_config.model_cache_max_entries,
+                               max_age_days=self.model_trainer_config.model_cache_max_age_days)
             
             ## To get best model score from dict
             best_model_score = max(sorted(model_report.values()))
@@ -95,7 +133,7 @@ class ModelTrainer:
             best_model_name = list(model_report.keys())[
                 list(model_report.values()).index(best_model_score)
             ]
-            best_model = models[best_model_name]
+            best_model = fitted_models[best_model_name]
 
             if best_model_score<0.6:
                 raise CustomException("No best model found")
@@ -103,7 +141,32 @@ class ModelTrainer:
 
             save_object(
                 file_path=self.model_trainer_config.trained_model_file_path,
-                obj=best_model
+                obj=best_model,
+                compress=self.model_trainer_config.model_compress
+            )
+
+            native_manifest=export_native_model(
+                model=best_model,
+                model_file_path=self.model_trainer_config.trained_model_file_path,
+                manifest_file_path=self.model_trainer_config.native_model_manifest_path,
+            )
+            if native_manifest is not None:
+                logging.info(f"Exported {best_model_name} in {native_manifest['format']} format to {native_manifest['path']}")
+
+            save_json(
+                file_path=self.model_trainer_config.model_report_file_path,
+                obj={
+                    "search_strategy": self.model_trainer_config.search_strategy,
+                    "search_budget": self.model_trainer_config.search_budget,
+                    "staged_boosting": self.model_trainer_config.staged_boosting,
+                    "best_model": best_model_name,
+                    "best_model_score": best_model_score,
+                    "native_model": native_manifest,
+                    "models": {
+                        name: {"test_r2": score, **search_info[name]}
+                        for name, score in model_report.items()
+                    },
+                },
             )
 
             predicted=best_model.predict(X_test)
@@ -0,0 +1,96 @@
+import os
+import sys
+
+import numpy as np
+
+from src.exception import CustomException
+from src.utils import file_sha256, save_json
+
+# best-model class -> (native format, file extension) written next to model.pkl
+NATIVE_FORMATS = {
+    "XGBRegressor": ("xgboost", ".ubj"),
+    "CatBoostRegressor": ("catboost", ".cbm"),
+}
+
+
+def export_native_model(model, model_file_path, manifest_file_path):
+    '''
+    Saves the booster inside an XGBRegressor / CatBoostRegressor in its library's
+    own format (XGBoost UBJSON, CatBoost .cbm) next to model_file_path and writes
+    a manifest tying it to the sha256 of that model.pkl. For any other model the
+    manifest and native files of a previous run are removed so PredictPipeline
+    falls back to model.pkl. Returns the manifest, or None.
+    '''
+    try:
+        stale_paths = [manifest_file_path] + [
+            os.path.splitext(model_file_path)[0] + extension for _, extension in NATIVE_FORMATS.values()
+        ]
+        for path in stale_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+        native = NATIVE_FORMATS.get(type(model).__name__)
+        if native is None:
+            return None
+
+        native_format, extension = native
+        native_path = os.path.splitext(model_file_path)[0] + extension
+        if native_format == "xgboost":
+            model.get_booster().save_model(native_path)
+        else:
+            model.save_model(native_path, format="cbm")
+
+        manifest = {
+            "format": native_format,
+            "path": os.path.basename(native_path),
+            "model_sha256": file_sha256(model_file_path),
+            "native_sha256": file_sha256(native_path),
+        }
+        save_json(manifest_file_path, manifest)
+        return manifest
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+class NativeModel:
+    '''
+    A booster loaded from its native file, with the predict(X) -> 1-D array
+    interface of the sklearn wrapper it was exported from. Only the core booster
+    class is touched (xgboost.Booster / catboost.CatBoost), not the sklearn wrappers.
+    '''
+
+    def __init__(self, native_format, file_path):
+        self.native_format = native_format
+        self.file_path = file_path
+
+        if native_format == "xgboost":
+            from xgboost import Booster
+
+            self.booster = Booster()
+            self.booster.load_model(file_path)
+        elif native_format == "catboost":
+            from catboost import CatBoost
+
+            self.booster = CatBoost()
+            self.booster.load_model(file_path, format="cbm")
+        else:
+            raise ValueError(f"Unknown native model format {native_format!r}, expected one of "
+                             f"{sorted(fmt for fmt, _ in NATIVE_FORMATS.values())}")
+
+    @classmethod
+    def loader(cls, native_format):
+        # ArtifactRegistry loader: file_path -> NativeModel
+        return lambda file_path: cls(native_format, file_path)
+
+    def predict(self, X):
+        try:
+            X = np.asarray(X)
+            if self.native_format == "xgboost":
+                # same call XGBRegressor.predict makes for dense input, minus the wrapper checks
+                return self.booster.inplace_predict(X)
+            return self.booster.predict(X, prediction_type="RawFormulaVal")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
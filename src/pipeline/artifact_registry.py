@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.metrics import ShardedMetrics
+from src.utils import file_sha256, load_object
+
+
+class ArtifactRegistry:
+    '''
+    Process-wide cache of unpickled artifacts (model, preprocessor, ...).
+
+    Every get() stats the file; an artifact is only unpickled again when its
+    mtime/size changed AND its sha256 differs from the loaded copy, so a
+    plain `touch` or a re-copy of the same file does not trigger a reload.
+    '''
+
+    def __init__(self, mmap_mode="r"):
+        # plain numpy arrays inside uncompressed joblib artifacts are memory-mapped read-only;
+        # tree models copy their nodes on unpickling, so workers only share those through
+        # serve.py loading them before the fork (copy-on-write)
+        self.mmap_mode = mmap_mode
+        self._entries = {}
+        self._digests = {}
+        self._lock = threading.Lock()
+        # hits are on every request's path: counted per thread, never under _lock
+        self._hits = ShardedMetrics()
+        self.misses = 0
+        self.reloads = 0
+
+    def get(self, file_path, loader=None):
+        '''
+        loader: callable file_path -> object for artifacts that are not joblib
+        files (native boosters, JSON manifests); defaults to load_object.
+        '''
+        try:
+            stat = os.stat(file_path)
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+
+            entry = self._entries.get(file_path)
+            if entry is not None and entry["stat_key"] == stat_key:
+                self._hits.inc("hits")
+                return entry["obj"]
+
+            with self._lock:
+                # another thread may have loaded it while we waited for the lock
+                entry = self._entries.get(file_path)
+                if entry is not None and entry["stat_key"] == stat_key:
+                    self._hits.inc("hits")
+                    return entry["obj"]
+
+                digest = file_sha256(file_path)
+                if entry is not None and entry["sha256"] == digest:
+                    entry["stat_key"] = stat_key
+                    self._hits.inc("hits")
+                    return entry["obj"]
+
+                start = time.perf_counter()
+                if loader is None:
+                    obj = load_object(file_path=file_path, mmap_mode=self.mmap_mode)
+                else:
+                    obj = loader(file_path)
+                load_seconds = time.perf_counter() - start
+                if entry is None:
+                    self.misses += 1
+                    logging.info(f"Loaded artifact {file_path} ({digest[:12]}) in {load_seconds:.3f}s")
+                else:
+                    self.reloads += 1
+                    logging.info(f"Reloaded changed artifact {file_path} ({digest[:12]}) in {load_seconds:.3f}s")
+
+                self._entries[file_path] = {"stat_key": stat_key, "sha256": digest, "obj": obj,
+                                            "load_seconds": load_seconds}
+                return obj
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def version(self, file_path):
+        '''sha256 of the currently loaded copy of file_path, or None if never loaded.'''
+        entry = self._entries.get(file_path)
+        return None if entry is None else entry["sha256"]
+
+    def digest(self, file_path):
+        '''sha256 of file_path on disk without loading it; rehashed only when mtime/size change.'''
+        try:
+            stat = os.stat(file_path)
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            cached = self._digests.get(file_path)
+            if cached is not None and cached[0] == stat_key:
+                return cached[1]
+            digest = file_sha256(file_path)
+            self._digests[file_path] = (stat_key, digest)
+            return digest
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @property
+    def hits(self):
+        return self._hits.collect()[0].get(("hits", ()), 0)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "artifacts": {path: entry["sha256"] for path, entry in self._entries.items()},
+            "load_seconds": {path: entry["load_seconds"] for path, entry in self._entries.items()},
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+
+
+# shared by every PredictPipeline in the process
+artifact_registry = ArtifactRegistry()
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.predict_pipeline import PredictPipeline
+from src.pipeline.prediction_cache import PredictionCache
+
+
+@dataclass
+class AsyncPredictorConfig:
+    max_workers: int = os.cpu_count() or 1   # threads / processes running PredictPipeline calls
+    max_pending: int = 64                    # running + queued calls; more are rejected, not queued
+    executor: str = "thread"                 # "thread" or "process"
+
+
+class Overloaded(Exception):
+    '''Raised instead of queueing when max_pending calls are already in flight.'''
+
+
+# one pipeline per pool process, created by the pool initializer
+_process_pipeline = None
+
+
+def _init_process(cache_config=None, use_lookup_table=False):
+    global _process_pipeline
+    cache = None if cache_config is None else PredictionCache(cache_config)
+    _process_pipeline = PredictPipeline(cache=cache, use_lookup_table=use_lookup_table)
+    _process_pipeline.get_model()
+    _process_pipeline.get_encoder()
+
+
+def _process_call(method, *args):
+    return getattr(_process_pipeline, method)(*args)
+
+
+class AsyncPredictor:
+    '''
+    Runs PredictPipeline calls off the event loop on a bounded pool.
+
+    The event loop only awaits the result, so slow predictions never block other
+    connections. Admission is bounded: once max_pending calls are running or
+    waiting for a pool slot, further calls raise Overloaded straight away, so
+    callers can answer 503 instead of letting latency grow without limit.
+    Must be used from a single event loop (the counters are not locked).
+    '''
+
+    def __init__(self, pipeline=None, config=None):
+        self.pipeline = pipeline if pipeline is not None else PredictPipeline()
+        self.config = config if config is not None else AsyncPredictorConfig()
+        if self.config.executor == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.config.max_workers, thread_name_prefix="predict")
+        elif self.config.executor == "process":
+            # every process gets its own pipeline (and cache), configured like self.pipeline
+            cache_config = None if self.pipeline.cache is None else self.pipeline.cache.config
+            self._executor = ProcessPoolExecutor(max_workers=self.config.max_workers, initializer=_init_process,
+                                                 initargs=(cache_config, self.pipeline.use_lookup_table))
+        else:
+            raise ValueError(f"Unknown executor {self.config.executor!r}, expected 'thread' or 'process'")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def _run(self, method, *args):
+        if self.pending >= self.config.max_pending:
+            self.rejected += 1
+            raise Overloaded(f"{self.pending} predictions already in flight")
+
+        self.pending += 1
+        try:
+            if self.config.executor == "thread":
+                call = partial(getattr(self.pipeline, method), *args)
+            else:
+                call = partial(_process_call, method, *args)
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, call)
+            self.completed += 1
+            return result
+        finally:
+            self.pending -= 1
+
+    async def predict_record(self, record):
+        return await self._run("predict_record", record)
+
+    async def predict(self, features):
+        return await self._run("predict", features)
+
+    def stats(self):
+        return {
+            "executor": self.config.executor,
+            "max_workers": self.config.max_workers,
+            "max_pending": self.config.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def warm_up(self):
+        '''Loads the artifacts in every pool worker before traffic arrives.'''
+        try:
+            if self.config.executor == "thread":
+                self.pipeline.get_model()
+                self.pipeline.get_encoder()
+            else:
+                # the pool initializer loads them; a round of no-op tasks starts the processes
+                list(self._executor.map(int, range(self.config.max_workers)))
+            logging.info(f"AsyncPredictor ready: {self.stats()}")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,203 @@
+import bisect
+import os
+import threading
+
+# Prometheus histogram buckets (upper bounds)
+REQUEST_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_ROWS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+STAGE_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class ThreadShards:
+    '''
+    Per-thread shards of hot-path state: each thread writes only to its own shard
+    (no lock), merged() combines them when read. Shards of threads that have
+    exited are folded into one base shard then, so they don't pile up.
+    Subclasses define new_shard() and merge(target, shard).
+    '''
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []   # (thread, shard)
+        self._base = self.new_shard()
+        self._lock = threading.Lock()
+
+    def new_shard(self):
+        raise NotImplementedError
+
+    def merge(self, target, shard):
+        raise NotImplementedError
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = self.new_shard()
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def merged(self):
+        total = self.new_shard()
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # a finished thread never writes again: fold it into the base for good
+                    self.merge(self._base, shard)
+            self._shards = live
+            self.merge(total, self._base)
+        for _, shard in live:
+            self.merge(total, shard)
+        return total
+
+    def reset(self):
+        with self._lock:
+            self._local = threading.local()
+            self._shards = []
+            self._base = self.new_shard()
+
+
+class ShardedMetrics(ThreadShards):
+    '''
+    Counters and histograms for the hot path, aggregated per thread (see
+    ThreadShards); collect() sums them when /metrics is scraped. Labels are
+    passed as a tuple of (name, value) pairs.
+    '''
+
+    def new_shard(self):
+        return {"counters": {}, "histograms": {}}
+
+    def merge(self, target, shard):
+        for key, value in list(shard["counters"].items()):
+            target["counters"][key] = target["counters"].get(key, 0) + value
+        for key, (buckets, counts, total, count) in list(shard["histograms"].items()):
+            merged = target["histograms"].get(key)
+            if merged is None:
+                merged = target["histograms"][key] = [buckets, [0] * len(counts), 0.0, 0]
+            for i, bucket_count in enumerate(list(counts)):
+                merged[1][i] += bucket_count
+            merged[2] += total
+            merged[3] += count
+
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard()["counters"]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets, labels=()):
+        histograms = self._shard()["histograms"]
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            # [buckets, count per bucket (+inf last), sum, count]
+            histogram = histograms[key] = [buckets, [0] * (len(buckets) + 1), 0.0, 0]
+        histogram[1][bisect.bisect_left(buckets, value)] += 1
+        histogram[2] += value
+        histogram[3] += 1
+
+    def collect(self):
+        '''Returns ({(name, labels): total}, {(name, labels): (buckets, counts, sum, count)}).'''
+        total = self.merged()
+        return total["counters"], {key: tuple(histogram) for key, histogram in total["histograms"].items()}
+
+
+# request counters / histograms of this process
+service_metrics = ShardedMetrics()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class PrometheusText:
+    '''Builds a Prometheus text exposition (format 0.0.4), one metric family at a time.'''
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, help_text, samples):
+        '''samples: (sample name suffix, labels, value) tuples.'''
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            self.lines.append(f"{name}{suffix}{_format_labels(labels)} {float(value)!r}")
+
+    def histogram(self, name, help_text, series):
+        '''series: {labels: (buckets, counts, sum, count)}'''
+        samples = []
+        for labels, (buckets, counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", labels + (("le", bound if bound == "+Inf" else repr(float(bound))),), cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        self.family(name, "histogram", help_text, samples)
+
+    def render(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def render_service_metrics(pipeline, stage_timings, prediction_cache=None, micro_batcher=None):
+    '''Prometheus exposition of the request metrics plus the pipeline, cache and registry state.'''
+    counters, histograms = service_metrics.collect()
+    text = PrometheusText()
+
+    text.family("http_requests_total", "counter", "HTTP requests by route, method and status.",
+                [("", labels, value) for (name, labels), value in sorted(counters.items())
+                 if name == "http_requests_total"])
+    for name, help_text in (
+        ("http_request_duration_seconds", "HTTP request latency by route."),
+        ("prediction_batch_rows", "Rows per prediction request by route."),
+    ):
+        text.histogram(name, help_text, {labels: series for (metric, labels), series in histograms.items() if metric == name})
+
+    stage_samples = []
+    for stage, histogram in sorted(stage_timings.histograms().items()):
+        labels = (("stage", stage),)
+        stage_samples += [("", labels + (("quantile", repr(q)),), histogram.percentile(q)) for q in STAGE_QUANTILES]
+        stage_samples += [("_sum", labels, histogram.total), ("_count", labels, histogram.count)]
+    text.family("prediction_stage_seconds", "summary",
+                "Latency of each prediction stage (parse_request, load_artifacts, transform, predict, ...).",
+                stage_samples)
+
+    if prediction_cache is not None:
+        stats = prediction_cache.stats()
+        text.family("prediction_cache_hits_total", "counter", "Prediction cache hits.", [("", (), stats["hits"])])
+        text.family("prediction_cache_misses_total", "counter", "Prediction cache misses.", [("", (), stats["misses"])])
+        text.family("prediction_cache_hit_ratio", "gauge", "Prediction cache hits / lookups.", [("", (), stats["hit_rate"])])
+        text.family("prediction_cache_entries", "gauge", "Predictions currently cached.", [("", (), stats["size"])])
+        text.family("prediction_cache_evictions_total", "counter", "LRU evictions.", [("", (), stats["evictions"])])
+        text.family("prediction_cache_invalidations_total", "counter", "Cache drops on a new model version.",
+                    [("", (), stats["invalidations"])])
+
+    if micro_batcher is not None:
+        stats = micro_batcher.stats()
+        text.family("micro_batches_total", "counter", "Model calls made by the micro-batcher.", [("", (), stats["batches"])])
+        text.family("micro_batch_rows_total", "counter", "Rows predicted by the micro-batcher.", [("", (), stats["rows"])])
+
+    registry = pipeline.registry.stats()
+    lookups = registry["hits"] + registry["misses"] + registry["reloads"]
+    text.family("artifact_cache_hit_ratio", "gauge", "Artifact registry gets served without unpickling.",
+                [("", (), registry["hits"] / lookups if lookups else 0.0)])
+    text.family("artifact_reloads_total", "counter", "Artifacts reloaded after a change on disk.", [("", (), registry["reloads"])])
+    text.family("artifact_load_seconds", "gauge", "Time the currently loaded copy of each artifact took to load.",
+                [("", (("artifact", path),), seconds) for path, seconds in sorted(registry["load_seconds"].items())])
+
+    # the model.pkl version this process actually serves (a native export counts as the model.pkl it was made from)
+    model_sha256 = pipeline.loaded_model_sha256
+    text.family("model_info", "gauge", "Loaded model version as model.pkl's sha256 (0 until a model is loaded).",
+                [("", (("model_sha256", model_sha256 or ""), ("pid", os.getpid())), 1 if model_sha256 else 0)])
+
+    return text.render()
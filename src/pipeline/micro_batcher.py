@@ -0,0 +1,130 @@
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class MicroBatcherConfig:
+    max_batch_size: int = 32    # rows per model call
+    max_wait_ms: float = 5.0    # how long the first request of a batch waits for company
+
+
+class MicroBatcher:
+    '''
+    Coalesces concurrent small prediction requests into one model call.
+
+    Callers submit a (usually one-row) feature DataFrame and get a Future back.
+    A single worker thread takes the first pending request, keeps collecting
+    more for up to max_wait_ms or until max_batch_size rows, concatenates them,
+    runs predict_fn once and hands every caller its own slice of the result.
+    If that call fails, the requests of the batch are re-run one at a time so
+    only the failing ones get the exception.
+    '''
+
+    def __init__(self, predict_fn, config=None):
+        self.predict_fn = predict_fn
+        self.config = config if config is not None else MicroBatcherConfig()
+        self._queue = queue.Queue()
+        self._closed = False
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, features):
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((features, future))
+        return future
+
+    def predict(self, features, timeout=None):
+        try:
+            return self.submit(features).result(timeout=timeout)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "avg_batch_rows": self.rows / self.batches if self.batches else 0.0,
+        }
+
+    def _collect(self, first):
+        batch = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.config.max_wait_ms / 1000.0
+        while rows < self.config.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # keep the shutdown marker for the main loop
+                self._queue.put(None)
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run_one_by_one(self, batch, error):
+        # one bad request must not fail the others coalesced with it: retry each on its own
+        if len(batch) == 1:
+            batch[0][1].set_exception(error)
+            return
+        for features, future in batch:
+            try:
+                future.set_result(self.predict_fn(features))
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += 1
+            self.rows += len(features)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [item for item in self._collect(first) if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                frames = [features for features, _ in batch]
+                features = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+                preds = self.predict_fn(features)
+            except Exception as e:
+                logging.info(f"Micro-batch of {len(batch)} requests failed: {e}")
+                self._run_one_by_one(batch, e)
+                continue
+
+            start = 0
+            for frame, future in batch:
+                future.set_result(preds[start:start + len(frame)])
+                start += len(frame)
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.rows += start
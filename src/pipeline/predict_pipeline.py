@@ -1,24 +1,162 @@
 import sys
 import os 
+import numpy as np
 import pandas as pd
 from src.exception import CustomException
-from src.utils import load_object
+from src.components.feature_encoder import FeatureEncoder
+from src.components.lookup_table import LookupTable, LookupTableConfig, metadata_path_of
+from src.components.native_model import NativeModel
+from src.pipeline.artifact_registry import artifact_registry
+from src.pipeline.stage_timings import stage_timings
+from src.schema import CATEGORY_DOMAINS, FEATURE_COLUMNS, INPUT_SCORE_COLUMNS, SCORE_RANGE
+from src.utils import load_json
 
 
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, registry=None, cache=None, use_lookup_table=False):
+        self.registry = registry if registry is not None else artifact_registry
+        # optional PredictionCache in front of predict / predict_record
+        self.cache = cache
+        # answer from the precomputed prediction table (src/components/lookup_table.py) when it matches the model
+        self.use_lookup_table = use_lookup_table
+        self.model_path=os.path.join("artifacts","model.pkl")
+        self.preprocessor_path=os.path.join('artifacts','preprocessor.pkl')
+        self.encoder_path=os.path.join('artifacts','feature_encoder.pkl')
+        self.native_manifest_path=os.path.join('artifacts','model_native.json')
+        self.lookup_table_path=LookupTableConfig().table_file_path
+        self._encoder=None
+        self._encoder_version=None
+        self._lookup_table=None
+        # model.pkl sha256 of the model get_model() last returned (what this process serves)
+        self.loaded_model_sha256=None
+
+    def load(self):
+        # loads (or re-validates) the shared copies; unpickling only happens on a miss or a changed file
+        model=self.get_model()
+        preprocessor=self.registry.get(self.preprocessor_path)
+        return model, preprocessor
+
+    def get_model(self):
+        # the native XGBoost/CatBoost export when its manifest was written for the current
+        # model.pkl (no unpickling of the sklearn wrapper at all), otherwise model.pkl itself
+        if os.path.exists(self.native_manifest_path):
+            manifest=self.registry.get(self.native_manifest_path,loader=load_json)
+            if manifest["model_sha256"]==self.registry.digest(self.model_path):
+                native_path=os.path.join(os.path.dirname(self.native_manifest_path),manifest["path"])
+                model=self.registry.get(native_path,loader=NativeModel.loader(manifest["format"]))
+                self.loaded_model_sha256=manifest["model_sha256"]
+                return model
+        model=self.registry.get(self.model_path)
+        self.loaded_model_sha256=self.registry.version(self.model_path)
+        return model
+
+    def get_encoder(self):
+        # prefer the exported feature_encoder.pkl when it was compiled from the current
+        # preprocessor.pkl, otherwise compile one; rebuilt only when preprocessor.pkl changes.
+        # preprocessor.pkl is only unpickled (importing sklearn) when there is no usable export
+        version=self.registry.digest(self.preprocessor_path)
+        if self._encoder is None or self._encoder_version!=version:
+            encoder=None
+            if os.path.exists(self.encoder_path):
+                encoder=self.registry.get(self.encoder_path)
+                if encoder.source_sha256!=version:
+                    encoder=None
+            if encoder is None:
+                preprocessor=self.registry.get(self.preprocessor_path)
+                encoder=FeatureEncoder.from_preprocessor(preprocessor,source_sha256=version)
+            self._encoder=encoder
+            self._encoder_version=version
+        return self._encoder
+
+    def model_version(self):
+        # hashes of the deployed model + preprocessing; cached predictions are only valid for one version
+        return f"{self.registry.digest(self.model_path)}:{self.registry.digest(self.preprocessor_path)}"
+
+    def get_lookup_table(self):
+        # None unless the table on disk was built from the deployed model + preprocessing
+        # and its metadata belongs to that very table file
+        metadata_path=metadata_path_of(self.lookup_table_path)
+        if not (os.path.exists(self.lookup_table_path) and os.path.exists(metadata_path)):
+            return None
+        metadata=self.registry.get(metadata_path,loader=load_json)
+        values=self.registry.get(self.lookup_table_path,loader=lambda path: np.load(path,mmap_mode="r"))
+        if (metadata["model_version"]!=self.model_version()
+                or metadata["table_sha256"]!=self.registry.version(self.lookup_table_path)):
+            return None
+        table=self._lookup_table
+        if table is None or table.values is not values or table.metadata is not metadata:
+            table=self._lookup_table=LookupTable(values,metadata)
+        return table
+
+    def _predict_cached(self,keys,predict_rows):
+        # answers the cached keys, runs predict_rows(indices) for the rest and caches those
+        version=self.model_version()
+        values,missing=self.cache.get_many(version,keys)
+        if missing:
+            computed=predict_rows(missing).tolist()
+            self.cache.put_many(version,[keys[i] for i in missing],computed)
+            for i,value in zip(missing,computed):
+                values[i]=value
+        return np.asarray(values)
+
+    def predict_record(self,record):
+        '''
+        Fast path for a single record (dict or tuple of the seven raw fields):
+        no DataFrame, no ColumnTransformer, just the compiled FeatureEncoder.
+        '''
+        try:
+            values=[record.get(column) for column in FEATURE_COLUMNS] if isinstance(record,dict) else list(record)
+            if self.use_lookup_table:
+                with stage_timings.span("lookup_table"):
+                    table=self.get_lookup_table()
+                    pred=None if table is None else table.lookup_record(values)
+                if pred is not None:
+                    return np.array([pred])
+
+            def predict_rows(_):
+                with stage_timings.span("load_artifacts"):
+                    model=self.get_model()
+                    encoder=self.get_encoder()
+                with stage_timings.span("transform"):
+                    features=encoder.transform_record(record)
+                with stage_timings.span("predict"):
+                    return model.predict(features.reshape(1,-1))
+
+            if self.cache is None:
+                return predict_rows(None)
+            return self._predict_cached([self.cache.make_key(values)],predict_rows)
+        
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def _predict_frame(self,model,encoder,features):
+        def predict_rows(rows):
+            with stage_timings.span("transform"):
+                data_scaled=encoder.transform(features if rows is None else features.iloc[rows])
+            with stage_timings.span("predict"):
+                return model.predict(data_scaled)
+
+        # large batches stay fully vectorized; the cache is for single records and small frames
+        if self.cache is None or len(features)>self.cache.config.max_frame_rows:
+            return predict_rows(None)
+
+        keys=[self.cache.make_key(row) for row in features[FEATURE_COLUMNS].itertuples(index=False,name=None)]
+        return self._predict_cached(keys,predict_rows)
 
     def predict(self,features):
         try:
-            model_path=os.path.join("artifacts","model.pkl")
-            preprocessor_path=os.path.join('artifacts','preprocessor.pkl')
-            print("Before Loading")
-            model=load_object(file_path=model_path)
-            preprocessor=load_object(file_path=preprocessor_path)
-            print("After Loading")
-            data_scaled=preprocessor.transform(features)
-            preds=model.predict(data_scaled)
+            with stage_timings.span("load_artifacts"):
+                model=self.get_model()
+                encoder=self.get_encoder()
+                table=self.get_lookup_table() if self.use_lookup_table else None
+            if table is None:
+                return self._predict_frame(model,encoder,features)
+
+            # table answers every in-domain row; the rest (missing values, fractional scores) go to the model
+            with stage_timings.span("lookup_table"):
+                preds,missing=table.lookup_frame(features)
+            if len(missing):
+                preds[missing]=self._predict_frame(model,encoder,features.iloc[missing])
             return preds
         
         except Exception as e:
@@ -50,6 +188,17 @@ class CustomData:
 
         self.writing_score = writing_score
 
+    def get_data_as_dict(self):
+        return {
+            "gender": self.gender,
+            "race_ethnicity": self.race_ethnicity,
+            "parental_level_of_education": self.parental_level_of_education,
+            "lunch": self.lunch,
+            "test_preparation_course": self.test_preparation_course,
+            "reading_score": self.reading_score,
+            "writing_score": self.writing_score,
+        }
+
     def get_data_as_data_frame(self):
         try:
             custom_data_input_dict = {
@@ -65,4 +214,48 @@ class CustomData:
             return pd.DataFrame(custom_data_input_dict)
 
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+
+def build_batch_data_frame(data):
+    '''
+    Turns a batch of raw records (list of dicts, or a DataFrame parsed from CSV)
+    into the frame the preprocessor expects, keeping the input row order.
+    Raises ValueError on missing columns, categories outside CATEGORY_DOMAINS,
+    non-numeric (or boolean) scores and scores outside SCORE_RANGE; missing values
+    are left for the imputers.
+    '''
+    if isinstance(data, pd.DataFrame):
+        df = data
+    else:
+        if not isinstance(data, list) or not all(isinstance(record, dict) for record in data):
+            raise ValueError("Expected a list of records (objects)")
+        df = pd.DataFrame.from_records(data)
+
+    if len(df) == 0:
+        raise ValueError("No records to score")
+
+    missing = [column for column in FEATURE_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    df = df[FEATURE_COLUMNS].reset_index(drop=True)
+    for column, domain in CATEGORY_DOMAINS.items():
+        values = df[column]
+        unknown = values.notna() & ~values.isin(domain)
+        if unknown.any():
+            raise ValueError(f"Unknown categories {sorted(set(values[unknown].astype(str)))} in column {column!r}")
+    low, high = SCORE_RANGE
+    for column in INPUT_SCORE_COLUMNS:
+        values = df[column]
+        # JSON true/false would otherwise pass as 1.0/0.0 (only object columns can mix them with numbers)
+        if pd.api.types.is_bool_dtype(values) or (
+            values.dtype == object and values.map(lambda value: isinstance(value, (bool, np.bool_))).any()
+        ):
+            raise ValueError(f"Booleans are not scores in column {column!r}")
+        values = pd.to_numeric(values, errors="raise").astype(float)
+        outside = values.notna() & ~values.between(low, high)
+        if outside.any():
+            raise ValueError(f"Scores {sorted(set(values[outside].tolist()))} outside {low}-{high} in column {column!r}")
+        df[column] = values
+    return df
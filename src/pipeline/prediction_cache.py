@@ -0,0 +1,129 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from src.logger import logging
+
+
+@dataclass
+class PredictionCacheConfig:
+    max_size: int = 65536                 # entries kept, least recently used evicted first
+    ttl_seconds: Optional[float] = 3600   # None = entries only expire on a new model version
+    # frames with more rows skip the cache: keying rows one by one in Python costs more
+    # than the vectorized encoder + model call it would save
+    max_frame_rows: int = 64
+
+
+class PredictionCache:
+    '''
+    LRU cache of single-row predictions keyed by the seven raw input fields.
+
+    Every lookup passes the version of the deployed artifacts (hashes of
+    model.pkl and preprocessor.pkl); when it differs from the version the
+    cached entries were computed with, the whole cache is dropped, so a new
+    model is never answered from stale predictions.
+    '''
+
+    def __init__(self, config=None):
+        self.config = config if config is not None else PredictionCacheConfig()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(values):
+        # 72 and 72.0 are the same input; NaN/None both mean "missing"
+        key = []
+        for value in values:
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                key.append(None)
+            elif isinstance(value, str):
+                key.append(value)
+            else:
+                key.append(float(value))
+        return tuple(key)
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+                logging.info(f"Prediction cache: model version changed, dropped {len(self._entries)} entries")
+            self._entries.clear()
+            self.version = version
+
+    def get_many(self, version, keys):
+        '''Returns (values, missing): cached value or None per key, and the indices of the misses.'''
+        now = time.monotonic()
+        values, missing = [], []
+        with self._lock:
+            self._check_version(version)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    values.append(None)
+                    missing.append(i)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(entry[0])
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return values, missing
+
+    def put_many(self, version, keys, values):
+        ttl = self.config.ttl_seconds
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._check_version(version)
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.config.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.config.max_size,
+            "ttl_seconds": self.config.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "version": self.version,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def prediction_cache_from_env():
+    '''
+    PredictionCache configured by PREDICTION_CACHE_SIZE (opt-in: default 0 = no cache
+    -> None), PREDICTION_CACHE_TTL seconds (default 3600, 0 = no TTL) and
+    PREDICTION_CACHE_MAX_FRAME_ROWS (default 64, larger frames bypass the cache).
+    '''
+    max_size = int(os.environ.get("PREDICTION_CACHE_SIZE", 0))
+    if max_size <= 0:
+        return None
+    ttl_seconds = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+    max_frame_rows = int(os.environ.get("PREDICTION_CACHE_MAX_FRAME_ROWS", 64))
+    return PredictionCache(PredictionCacheConfig(max_size=max_size, ttl_seconds=ttl_seconds or None,
+                                                 max_frame_rows=max_frame_rows))
@@ -0,0 +1,110 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+from src.pipeline.metrics import ThreadShards
+
+# log-spaced bucket upper bounds in seconds: 1us .. 100s, 20 buckets per decade (~12% wide)
+DEFAULT_BOUNDS = tuple(1e-6 * 10 ** (i / 20) for i in range(0, 8 * 20 + 1))
+
+
+class LatencyHistogram:
+    '''
+    Fixed-bucket latency histogram: constant memory however many observations,
+    percentiles interpolated inside the bucket they fall in.
+    Not thread-safe on its own; StageTimings gives every thread its own copies.
+    '''
+
+    def __init__(self, bounds=DEFAULT_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last bucket: above the largest bound
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for i, count in enumerate(list(other.counts)):
+            self.counts[i] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= target:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                value = lower + (upper - lower) * (target - cumulative) / count
+                return min(value, self.max)
+            cumulative += count
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1e3,
+            "p95_ms": self.percentile(0.95) * 1e3,
+            "p99_ms": self.percentile(0.99) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+
+class StageTimings(ThreadShards):
+    '''
+    Latency histogram per named stage of the prediction path
+    (parse_request, build_dataframe, load_artifacts, transform, predict, ...),
+    one {stage: LatencyHistogram} shard per thread, so observing never takes a lock.
+
+        with stage_timings.span("predict"):
+            preds = model.predict(X)
+    '''
+
+    def __init__(self, bounds=DEFAULT_BOUNDS):
+        self.bounds = bounds
+        super().__init__()
+
+    def new_shard(self):
+        return {}
+
+    def merge(self, target, shard):
+        for stage, histogram in list(shard.items()):
+            target.setdefault(stage, LatencyHistogram(self.bounds)).merge(histogram)
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        shard = self._shard()
+        histogram = shard.get(stage)
+        if histogram is None:
+            histogram = shard[stage] = LatencyHistogram(self.bounds)
+        histogram.observe(seconds)
+
+    def histograms(self):
+        '''{stage: LatencyHistogram} merged over all threads.'''
+        return self.merged()
+
+    def snapshot(self):
+        return {stage: histogram.snapshot() for stage, histogram in sorted(self.histograms().items())}
+
+
+# shared by the pipeline and the web apps of this process
+stage_timings = StageTimings()
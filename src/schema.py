@@ -0,0 +1,99 @@
+# Column layout and compact dtypes of the student performance dataset (notebook/data/stud.csv)
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from src.logger import logging
+
+TARGET_COLUMN = "math_score"
+
+# allowed values of every categorical column; anything else is rejected by apply_schema
+CATEGORY_DOMAINS = {
+    "gender": ["female", "male"],
+    "race_ethnicity": ["group A", "group B", "group C", "group D", "group E"],
+    "parental_level_of_education": [
+        "associate's degree",
+        "bachelor's degree",
+        "high school",
+        "master's degree",
+        "some college",
+        "some high school",
+    ],
+    "lunch": ["free/reduced", "standard"],
+    "test_preparation_course": ["completed", "none"],
+}
+
+CATEGORICAL_COLUMNS = list(CATEGORY_DOMAINS)
+
+NUMERICAL_COLUMNS = ["writing_score", "reading_score"]
+
+# exam scores are whole numbers 0-100, so they fit in uint8
+SCORE_COLUMNS = ["math_score", "reading_score", "writing_score"]
+SCORE_RANGE = (0, 100)
+
+# what a prediction request carries: every column but the target, in the order the
+# serving side (cache keys, lookup table axes, CustomData) lays records out
+INPUT_SCORE_COLUMNS = [column for column in SCORE_COLUMNS if column != TARGET_COLUMN]
+FEATURE_COLUMNS = CATEGORICAL_COLUMNS + INPUT_SCORE_COLUMNS
+SCORE_DTYPE = np.uint8
+
+CATEGORY_DTYPES = {column: CategoricalDtype(domain) for column, domain in CATEGORY_DOMAINS.items()}
+
+# dtypes for pd.read_csv: categoricals are parsed straight into categories (domain checked later)
+READ_CSV_DTYPES = {column: "category" for column in CATEGORICAL_COLUMNS}
+
+
+def apply_schema(df, required_columns=None):
+    '''
+    Casts the schema columns present in df to their compact dtypes (categoricals
+    -> category with the declared domain, scores -> uint8) and raises ValueError
+    on out-of-domain categories, non-integer or out-of-range scores, or missing
+    required columns. Scores with missing values are kept as float32 so the
+    imputer can still fill them.
+    '''
+    if required_columns is None:
+        required_columns = CATEGORICAL_COLUMNS + SCORE_COLUMNS
+    missing_columns = [column for column in required_columns if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing columns: {missing_columns}")
+
+    dtypes = {}
+    for column, dtype in CATEGORY_DTYPES.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        present = values.dropna()
+        unknown = set(present.unique()) - set(dtype.categories)
+        if unknown:
+            raise ValueError(f"Column {column!r} has values outside its domain: {sorted(map(str, unknown))}")
+        dtypes[column] = dtype
+
+    for column in SCORE_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = pd.to_numeric(df[column], errors="raise")
+        present = values.dropna()
+        low, high = SCORE_RANGE
+        if ((present < low) | (present > high) | (present != np.floor(present))).any():
+            raise ValueError(f"Column {column!r} has scores outside whole numbers {low}-{high}")
+        dtypes[column] = SCORE_DTYPE if len(present) == len(values) else np.float32
+
+    return df.astype(dtypes)
+
+
+def memory_usage_report(stage, **objects):
+    '''
+    Logs (and returns) the memory held by each DataFrame / ndarray passed in,
+    in MB, under the given pipeline stage name.
+    '''
+    report = {}
+    for name, obj in objects.items():
+        if isinstance(obj, (pd.DataFrame, pd.Series)):
+            size = obj.memory_usage(deep=True)
+            size = size.sum() if isinstance(size, pd.Series) else size
+        else:
+            size = getattr(obj, "nbytes", 0)
+        report[name] = round(int(size) / 1024 ** 2, 3)
+
+    logging.info(f"Memory usage [{stage}] (MB): {report}")
+    return report
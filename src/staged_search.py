@@ -0,0 +1,145 @@
+import sys
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterGrid
+from sklearn.utils.parallel import Parallel, delayed
+
+from src.candidate_cache import select_best
+from src.exception import CustomException
+
+# ensemble-size parameter of every model whose predictions can be read off per stage
+STAGED_RESOURCES = {
+    "GradientBoostingRegressor": "n_estimators",
+    "RandomForestRegressor": "n_estimators",
+    "XGBRegressor": "n_estimators",
+    "CatBoostRegressor": "iterations",
+}
+
+
+def staged_resource(model, para):
+    '''The ensemble-size param to stage over, or None if model/grid don't allow it.'''
+    resource = STAGED_RESOURCES.get(type(model).__name__)
+    if resource is None or len(para.get(resource, [])) < 2:
+        return None
+    return resource
+
+
+def staged_predictions(model, X, sizes):
+    '''
+    Yields (size, prediction) for every ensemble size in `sizes` (ascending)
+    from ONE model fitted at max(sizes), i.e. the prediction a model trained
+    with that many trees/iterations would make.
+    '''
+    name = type(model).__name__
+
+    if name == "XGBRegressor":
+        for size in sizes:
+            yield size, model.predict(X, iteration_range=(0, size))
+
+    elif name == "CatBoostRegressor":
+        tree_count = model.tree_count_
+        for size in sizes:
+            yield size, model.predict(X, ntree_end=min(size, tree_count))
+
+    elif name == "RandomForestRegressor":
+        # trees are independent: the first k trees are a k-tree forest
+        wanted = set(sizes)
+        total = 0.0
+        for i, tree in enumerate(model.estimators_, start=1):
+            total = total + tree.predict(X)
+            if i in wanted:
+                yield i, total / i
+
+    else:
+        # GradientBoosting (stops early only with n_iter_no_change, in which case
+        # a bigger n_estimators would have stopped at the same point)
+        wanted = list(sizes)
+        pred = None
+        for i, pred in enumerate(model.staged_predict(X), start=1):
+            while wanted and wanted[0] == i:
+                yield wanted.pop(0), pred
+        for size in wanted:
+            yield size, pred
+
+
+def _fit_and_score_stages(model, params, resource, sizes, X, y, train_idx, test_idx):
+    estimator = clone(model).set_params(**params, **{resource: sizes[-1]})
+    estimator.fit(X[train_idx], y[train_idx])
+    return {size: r2_score(y[test_idx], pred) for size, pred in staged_predictions(estimator, X[test_idx], sizes)}
+
+
+class StagedSearchCV:
+    '''
+    Grid search for ensembles where the ensemble size is one of the grid axes.
+
+    Instead of training every (params, n_estimators) candidate from scratch, each
+    combination of the other params is trained once per CV fold at the largest
+    size and scored at every size in the grid via staged predictions, so the cost
+    no longer grows with the length of the n_estimators / iterations list.
+    With a CandidateCache (src/candidate_cache.py), candidates with cached fold
+    scores are not refitted: a combination is trained only up to the largest of its
+    missing sizes, and not at all when every size is cached.
+    Exposes the GridSearchCV attributes evaluate_models relies on.
+    '''
+
+    def __init__(self, estimator, param_grid, resource, cv=3, n_jobs=None, cache=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.resource = resource
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.cache = cache
+
+    def fit(self, X, y):
+        try:
+            X, y = np.asarray(X), np.asarray(y)
+            grid = dict(self.param_grid)
+            sizes = sorted(grid.pop(self.resource))
+            other_params = list(ParameterGrid(grid))
+            folds = list(KFold(n_splits=self.cv).split(X))
+
+            candidates = [{**params, self.resource: size} for params in other_params for size in sizes]
+            if self.cache is not None:
+                scores, missing = self.cache.lookup(candidates)
+            else:
+                scores, missing = {}, list(range(len(candidates)))
+
+            # sizes still to score per combination of the other params
+            missing_sizes = {}
+            for i in missing:
+                missing_sizes.setdefault(i // len(sizes), []).append(candidates[i][self.resource])
+            groups = sorted(missing_sizes)
+
+            fold_scores = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_and_score_stages)(self.estimator, other_params[group], self.resource,
+                                               missing_sizes[group], X, y, train_idx, test_idx)
+                for group in groups
+                for train_idx, test_idx in folds
+            )
+
+            for g, group in enumerate(groups):
+                group_scores = fold_scores[g * len(folds):(g + 1) * len(folds)]
+                for size in missing_sizes[group]:
+                    i = group * len(sizes) + sizes.index(size)
+                    scores[i] = [score[size] for score in group_scores]
+                    if self.cache is not None:
+                        self.cache.put(candidates[i], scores[i])
+
+            best, mean_scores = select_best([scores[i] for i in range(len(candidates))])
+            self.cv_results_ = {"params": candidates, "mean_test_score": mean_scores}
+            self.best_index_ = best
+            self.best_params_ = candidates[best]
+            self.best_score_ = mean_scores[best]
+            self.n_fits_ = len(groups) * len(folds)
+
+            if self.cache is not None:
+                self.best_estimator_ = self.cache.fit_best(self.best_params_, X, y)
+            else:
+                self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+                self.best_estimator_.fit(X, y)
+            return self
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -1,62 +1,508 @@
 import os
 import sys
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import numpy as np 
 import pandas as pd
-import dill
-import pickle
-from sklearn.metrics import r2_score
-from sklearn.model_selection import GridSearchCV
+import joblib
 
 from src.exception import CustomException
+from src.logger import logging
+from src.schema import CATEGORICAL_COLUMNS
 
-def save_object(file_path, obj):
+# sklearn (and the model libraries behind it) is only imported inside the training
+# helpers below, so serving and ingestion can use this module without paying for it
+
+def save_object(file_path, obj, compress=0):
+    '''
+    Saves obj with joblib. compress=0 (default) keeps plain numpy arrays
+    uncompressed and aligned in the file so load_object(..., mmap_mode="r") can
+    memory-map them; compress=1..9 or a ("zlib"|"gzip"|"lz4"|..., level) tuple
+    trades load speed for disk size. Tree models are not mapped: sklearn's
+    Tree.__setstate__ copies its node arrays into memory it owns.
+    '''
     try:
         dir_path = os.path.dirname(file_path)
 
         os.makedirs(dir_path, exist_ok=True)
 
-        with open(file_path, "wb") as file_obj:
-            pickle.dump(obj, file_obj)
+        # write to a temp file first so readers (and cache lookups) never see a half-written artifact
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        joblib.dump(obj, tmp_path, compress=compress)
+        os.replace(tmp_path, file_path)
 
     except Exception as e:
         raise CustomException(e, sys)
     
-def evaluate_models(X_train, y_train,X_test,y_test,models,param):
-    try:
-        report = {}
+def limit_model_threads(model):
+    '''
+    Pins a model's own threading to 1 so that parallel searches don't multiply
+    with XGBoost / CatBoost / RandomForest internal threads.
+    '''
+    params = model.get_params()
+    if "n_jobs" in params:
+        model.set_params(n_jobs=1)
+    if type(model).__module__.startswith("catboost"):
+        model.set_params(thread_count=1)
+    return model
+
+def model_thread_params(model):
+    '''
+    model's values of the params limit_model_threads overrides, to put back on the
+    fitted estimator so model.pkl keeps the threading the model was configured with.
+    '''
+    params = model.get_params()
+    thread_params = {}
+    if "n_jobs" in params:
+        thread_params["n_jobs"] = params["n_jobs"]
+    if type(model).__module__.startswith("catboost"):
+        thread_params["thread_count"] = params.get("thread_count", -1)
+    return thread_params
+
+def restore_model_threads(model, thread_params):
+    '''
+    Puts model_thread_params() back on a fitted model. CatBoost refuses set_params
+    once fitted, so its init params are updated the way its set_params does.
+    '''
+    if not thread_params:
+        return model
+    if type(model).__module__.startswith("catboost") and model.is_fitted():
+        model._init_params.update(thread_params)
+        if model._init_params.get("thread_count") == -1:
+            model._init_params.pop("thread_count")   # -1 (all cores) is CatBoost's unset default
+    else:
+        model.set_params(**thread_params)
+    return model
+
+# parameters that act as a training budget, used as the halving resource
+RESOURCE_PARAMS = ("n_estimators", "iterations")
+
+SEARCH_STRATEGIES = ("grid", "random", "halving")
+
+def build_search(model, para, search_strategy="grid", search_budget=None, cv_jobs=None, random_state=42,
+                 staged_boosting=False, cache=None):
+    '''
+    grid    - exhaustive GridSearchCV (original behaviour); with staged_boosting, ensembles
+              whose grid sweeps n_estimators / iterations use StagedSearchCV instead, which
+              fits once per fold at the largest size and scores every size from staged predictions
+    random  - RandomizedSearchCV over the same grid, search_budget candidates
+    halving - successive halving; n_estimators / iterations is the resource when the
+              grid has it (otherwise the number of samples), and at most
+              search_budget candidates enter the first round
+    cache   - optional CandidateCache (src/candidate_cache.py): grid and random searches
+              then only fit the candidates without cached CV scores; halving ignores it
+    '''
+    from sklearn.base import clone
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables the Halving*SearchCV imports)
+    from sklearn.model_selection import (
+        GridSearchCV,
+        HalvingGridSearchCV,
+        HalvingRandomSearchCV,
+        ParameterGrid,
+        ParameterSampler,
+        RandomizedSearchCV,
+    )
+    from src.candidate_cache import CachedSearchCV
+    from src.staged_search import StagedSearchCV, staged_resource
+
+    n_candidates = len(ParameterGrid(para))
+
+    if search_strategy == "grid" and staged_boosting:
+        resource = staged_resource(model, para)
+        if resource is not None:
+            return StagedSearchCV(model,para,resource,cv=3,n_jobs=cv_jobs,cache=cache)
+
+    if search_strategy == "grid" or n_candidates <= 1:
+        if cache is not None:
+            return CachedSearchCV(model,list(ParameterGrid(para)),cache,cv=3,n_jobs=cv_jobs)
+        return GridSearchCV(model,para,cv=3,n_jobs=cv_jobs)
 
-        for i in range(len(list(models))):
-            model = list(models.values())[i]
-            para=param[list(models.keys())[i]]
+    if search_strategy == "random":
+        n_iter = n_candidates if search_budget is None else min(search_budget, n_candidates)
+        if cache is not None:
+            # the same draw RandomizedSearchCV makes with this random_state
+            candidates = list(ParameterSampler(para,n_iter=n_iter,random_state=random_state))
+            return CachedSearchCV(model,candidates,cache,cv=3,n_jobs=cv_jobs)
+        return RandomizedSearchCV(model,para,n_iter=n_iter,cv=3,n_jobs=cv_jobs,random_state=random_state)
 
-            gs = GridSearchCV(model,para,cv=3)
-            gs.fit(X_train,y_train)
+    if search_strategy == "halving":
+        para = dict(para)
+        resource, resource_kwargs = "n_samples", {"min_resources": "exhaust"}
+        for name in RESOURCE_PARAMS:
+            if name in para:
+                values = para.pop(name)
+                resource = name
+                # "exhaust" sizes the first round so the last one trains at the largest grid value
+                resource_kwargs = {"min_resources": "exhaust", "max_resources": max(values)}
+                # CatBoost's get_params() only lists explicitly set params, which the halving check relies on
+                model = clone(model).set_params(**{name: max(values)})
+                break
 
-            model.set_params(**gs.best_params_)
-            model.fit(X_train,y_train)
+        n_candidates = len(ParameterGrid(para))
+        if search_budget is not None and n_candidates > search_budget:
+            return HalvingRandomSearchCV(model,para,n_candidates=search_budget,resource=resource,
+                                         cv=3,n_jobs=cv_jobs,random_state=random_state,**resource_kwargs)
+        return HalvingGridSearchCV(model,para,resource=resource,cv=3,n_jobs=cv_jobs,
+                                   random_state=random_state,**resource_kwargs)
 
-            #model.fit(X_train, y_train)  # Train model
+    raise ValueError(f"Unknown search strategy {search_strategy!r}, expected one of {SEARCH_STRATEGIES}")
 
-            y_train_pred = model.predict(X_train)
+# params that only affect speed/logging, not the fitted result
+CACHE_IGNORED_PARAMS = ("n_jobs", "thread_count", "verbose")
 
-            y_test_pred = model.predict(X_test)
+def training_data_digest(X_train, y_train):
+    '''sha256 of the training arrays' dtypes, shapes and bytes.'''
+    digest = hashlib.sha256()
+    for array in (X_train, y_train):
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
 
-            train_model_score = r2_score(y_train, y_train_pred)
+def search_cache_key(model, para, X_train, y_train, search_strategy, search_budget, staged_boosting):
+    '''
+    Content address of one whole model search (used for halving searches, whose
+    candidates are scored at varying budgets): training data, model class +
+    library version, base hyperparameters, param grid and search settings.
+    '''
+    digest = hashlib.sha256()
+    digest.update(training_data_digest(X_train, y_train).encode())
 
-            test_model_score = r2_score(y_test, y_test_pred)
+    model_class = type(model)
+    library = sys.modules.get(model_class.__module__.split(".")[0])
+    params = {key: value for key, value in model.get_params().items() if key not in CACHE_IGNORED_PARAMS}
+    description = {
+        "class": f"{model_class.__module__}.{model_class.__qualname__}",
+        "library_version": getattr(library, "__version__", None),
+        "params": sorted((key, repr(value)) for key, value in params.items()),
+        "grid": sorted((key, repr(value)) for key, value in para.items()),
+        "search": [search_strategy, search_budget, staged_boosting, 3],
+    }
+    digest.update(json.dumps(description, sort_keys=True).encode())
+    return digest.hexdigest()
 
-            report[list(models.keys())[i]] = test_model_score
+def _search_model(name, model, para, X_train, y_train, X_test, y_test, cv_jobs=None,
+                  search_strategy="grid", search_budget=None, staged_boosting=False, cache_dir=None,
+                  thread_params=None):
+    from sklearn.metrics import r2_score
+    from src.candidate_cache import CandidateCache
 
-        return report
+    cache, cache_path = None, None
+    if cache_dir is not None and search_strategy == "halving":
+        # halving scores candidates at growing budgets, so its result is only reusable as a whole
+        key = search_cache_key(model, para, X_train, y_train, search_strategy, search_budget, staged_boosting)
+        cache_path = os.path.join(cache_dir, f"{key}.pkl")
+    elif cache_dir is not None:
+        cache = CandidateCache(cache_dir, model, X_train, y_train, refit_params=thread_params)
+
+    if cache_path is not None and os.path.exists(cache_path):
+        cached = load_object(cache_path)
+        os.utime(cache_path)   # mark as recently used for purge_search_cache
+        model, search_info = cached["model"], dict(cached["search_info"], cache="hit")
+        logging.info(f"{name}: reusing cached search result {os.path.basename(cache_path)}")
+    else:
+        gs = build_search(model,para,search_strategy,search_budget,cv_jobs,staged_boosting=staged_boosting,cache=cache)
+        start = time.perf_counter()
+        gs.fit(X_train,y_train)
+        fit_seconds = time.perf_counter() - start
+
+        # the search already refit a clone with the best params on the full training set
+        model = gs.best_estimator_
+        # undo limit_model_threads before the model is cached or saved as model.pkl
+        restore_model_threads(model, thread_params)
+
+        y_train_pred = model.predict(X_train)
+
+        train_model_score = r2_score(y_train, y_train_pred)
+
+        search_info = {
+            "search": type(gs).__name__,
+            "best_params": gs.best_params_,
+            "n_candidates": len(gs.cv_results_["params"]),
+            "cv_score": float(gs.best_score_),
+            "train_r2": float(train_model_score),
+            "fit_seconds": round(fit_seconds, 3),
+        }
+
+        if cache is not None:
+            search_info["cache"] = {"cached_candidates": cache.hits, "fitted_candidates": cache.misses}
+        if cache_path is not None:
+            save_object(cache_path, {"model": model, "search_info": search_info})
+            search_info = dict(search_info, cache="miss")
+
+    y_test_pred = model.predict(X_test)
+
+    test_model_score = r2_score(y_test, y_test_pred)
+
+    return name, test_model_score, model, search_info
+
+def purge_search_cache(cache_dir, max_entries=None, max_age_days=None):
+    '''
+    Deletes cached search results not used for max_age_days, then the least
+    recently used ones beyond max_entries (None disables either limit).
+    Returns the number of files removed.
+    '''
+    try:
+        if cache_dir is None or not os.path.isdir(cache_dir):
+            return 0
+        entries = sorted(
+            (entry for entry in os.scandir(cache_dir) if entry.is_file() and entry.name.endswith(".pkl")),
+            key=lambda entry: entry.stat().st_mtime, reverse=True,
+        )
+        keep = entries if max_entries is None else entries[:max_entries]
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            keep = [entry for entry in keep if entry.stat().st_mtime >= cutoff]
+        kept = {entry.path for entry in keep}
+        removed = 0
+        for entry in entries:
+            if entry.path not in kept:
+                os.remove(entry.path)
+                removed += 1
+        if removed:
+            logging.info(f"Removed {removed} cached search results from {cache_dir}")
+        return removed
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def split_n_jobs(n_jobs, n_models):
+    '''
+    Splits a total worker budget into (model_jobs, cv_jobs) with
+    model_jobs * cv_jobs <= n_jobs: models first, the rest to CV fits.
+    '''
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    model_jobs = max(1, min(n_models, n_jobs))
+    cv_jobs = max(1, n_jobs // model_jobs)
+    return model_jobs, cv_jobs
+
+def evaluate_models(X_train, y_train,X_test,y_test,models,param,n_jobs=1,
+                    search_strategy="grid",search_budget=None,staged_boosting=False,cache_dir=None):
+    '''
+    n_jobs=1 runs every grid search sequentially (the original behaviour).
+    Any other value (-1/None = all cores) fans the models out over a process
+    pool and gives each GridSearchCV its share of the budget for its CV fits;
+    models are pinned to one thread each so the total stays within n_jobs (the returned
+    estimators get their original n_jobs / thread_count back).
+    search_strategy / search_budget / staged_boosting pick the hyperparameter search (see build_search).
+    With cache_dir set, grid and random searches store every candidate's CV scores there
+    (src/candidate_cache.py) and later runs only fit the candidates that are new or changed;
+    halving searches are stored whole under search_cache_key().
+    Returns (report, fitted_models, search_info): test R2, the refit best estimator
+    and the search details (best params, candidates tried, fit time) per model name.
+    The instances in `models` are left untouched.
+    '''
+    from sklearn.base import clone
+
+    try:
+        report = {}
+        fitted_models = {}
+        search_info = {}
+
+        if n_jobs == 1:
+            for name, model in models.items():
+                _, report[name], fitted_models[name], search_info[name] = _search_model(
+                    name, model, param[name], X_train, y_train, X_test, y_test,
+                    search_strategy=search_strategy, search_budget=search_budget,
+                    staged_boosting=staged_boosting, cache_dir=cache_dir)
+            return report, fitted_models, search_info
+
+        model_jobs, cv_jobs = split_n_jobs(n_jobs, len(models))
+        logging.info(f"Running model search with {model_jobs} model workers x {cv_jobs} CV workers")
+
+        scores = {}
+        with ProcessPoolExecutor(max_workers=model_jobs) as executor:
+            futures = [
+                executor.submit(_search_model, name, limit_model_threads(clone(model)), param[name],
+                                X_train, y_train, X_test, y_test, cv_jobs, search_strategy, search_budget,
+                                staged_boosting, cache_dir, model_thread_params(model))
+                for name, model in models.items()
+            ]
+            for future in as_completed(futures):
+                name, score, fitted_model, info = future.result()
+                scores[name] = (score, fitted_model, info)
+
+        # keep the report in the models' order, like the sequential path
+        for name in models:
+            report[name], fitted_models[name], search_info[name] = scores[name]
+
+        return report, fitted_models, search_info
 
     except Exception as e:
         raise CustomException(e, sys)
     
-def load_object(file_path):
+# leading bytes of the compressed containers joblib can write
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ", b"\x04\x22\x4d\x18", b"\x5d\x00\x00", b"\x78")
+
+def artifact_is_compressed(file_path):
+    with open(file_path, "rb") as file_obj:
+        head = file_obj.read(6)
+    return head.startswith(_COMPRESSED_MAGIC)
+
+def load_object(file_path, mmap_mode=None):
+    '''
+    Loads anything save_object wrote, and plain pickle .pkl files from before the
+    joblib switch (joblib reads regular pickles). mmap_mode="r" memory-maps the
+    plain numpy arrays of uncompressed joblib files (arrays that an object's
+    __setstate__ copies, like sklearn tree nodes, end up in private memory anyway);
+    it is skipped for compressed files and plain pickles.
+    '''
+    try:
+        if mmap_mode is not None and artifact_is_compressed(file_path):
+            mmap_mode = None
+        return joblib.load(file_path, mmap_mode=mmap_mode)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def file_sha256(file_path, chunk_size=1 << 20):
     try:
+        digest = hashlib.sha256()
         with open(file_path, "rb") as file_obj:
-            return pickle.load(file_obj)
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
 
     except Exception as e:
-        raise CustomException(e, sys)
\ No newline at end of file
+        raise CustomException(e, sys)
+
+def save_json(file_path, obj):
+    try:
+        dir_path = os.path.dirname(file_path)
+
+        os.makedirs(dir_path, exist_ok=True)
+
+        # temp file + rename like save_object: serving reads manifests while a retrain rewrites them
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file_obj:
+            json.dump(obj, file_obj, indent=2, default=str)
+        os.replace(tmp_path, file_path)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def load_json(file_path):
+    try:
+        with open(file_path, "r") as file_obj:
+            return json.load(file_obj)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+# file extension for every supported train/test/raw data artifact format
+ARTIFACT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+def with_artifact_format(file_path, artifact_format):
+    if artifact_format not in ARTIFACT_EXTENSIONS:
+        raise ValueError(f"Unknown artifact format {artifact_format!r}, expected one of {list(ARTIFACT_EXTENSIONS)}")
+    return os.path.splitext(file_path)[0] + ARTIFACT_EXTENSIONS[artifact_format]
+
+def artifact_format_of(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    for artifact_format, known_extension in ARTIFACT_EXTENSIONS.items():
+        if extension == known_extension:
+            return artifact_format
+    raise ValueError(f"Cannot tell the artifact format of {file_path!r}")
+
+def _as_categorical(df):
+    columns = [column for column in CATEGORICAL_COLUMNS if column in df.columns]
+    return df.astype({column: "category" for column in columns})
+
+def write_frame(df, file_path):
+    '''
+    Writes a DataFrame as csv / parquet / feather, picked from the file extension.
+    The columnar formats store the categorical columns as pandas categories.
+    '''
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        artifact_format = artifact_format_of(file_path)
+
+        if artifact_format == "csv":
+            df.to_csv(file_path, index=False, header=True)
+        elif artifact_format == "parquet":
+            _as_categorical(df).to_parquet(file_path, index=False)
+        else:
+            _as_categorical(df).reset_index(drop=True).to_feather(file_path)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def read_frame(file_path):
+    '''Reads back whatever write_frame / FrameWriter produced, based on the file extension.'''
+    try:
+        artifact_format = artifact_format_of(file_path)
+
+        if artifact_format == "csv":
+            return pd.read_csv(file_path)
+        if artifact_format == "parquet":
+            return _as_categorical(pd.read_parquet(file_path))
+        return _as_categorical(pd.read_feather(file_path))
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+class FrameWriter:
+    '''
+    Appends DataFrame chunks to one csv / parquet / feather file (format from the extension),
+    for streaming ingestion. Columnar chunks are written as nullable strings because each chunk
+    would otherwise carry its own category dictionary; read_frame restores the categories.
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.artifact_format = artifact_format_of(file_path)
+        self._writer = None
+        self._schema = None
+        self._started = False
+        self._empty = None
+
+    def write(self, df):
+        try:
+            if self.artifact_format == "csv":
+                df.to_csv(self.file_path, mode="a" if self._started else "w", header=not self._started, index=False)
+                self._started = True
+                return
+
+            if len(df) == 0 and self._writer is None:
+                # an all-empty first chunk would pin every column to arrow's null type
+                self._empty = df
+                return
+
+            import pyarrow as pa
+
+            columns = [column for column in CATEGORICAL_COLUMNS if column in df.columns]
+            # nullable "string" keeps missing values as nulls (astype(str) would store the text "nan")
+            table = pa.Table.from_pandas(df.astype({column: "string" for column in columns}), preserve_index=False)
+
+            if self._writer is None:
+                self._schema = table.schema
+                if self.artifact_format == "parquet":
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.file_path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.file_path, self._schema)
+            else:
+                table = table.cast(self._schema)
+
+            self._writer.write_table(table)
+            self._started = True
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif self._empty is not None:
+            write_frame(self._empty, self.file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
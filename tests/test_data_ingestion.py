@@ -0,0 +1,21 @@
+import numpy as np
+
+from src.components.data_ingestion import hash_split_mask
+
+
+def test_split_is_seeded():
+    masks = [hash_split_mask(0, 100_000, 0.2, seed) for seed in (42, 7, 12345)]
+    assert not np.array_equal(masks[0], masks[1])
+    assert not np.array_equal(masks[0], masks[2])
+    np.testing.assert_array_equal(masks[0], hash_split_mask(0, 100_000, 0.2, 42))
+    for mask in masks:
+        assert abs(mask.mean() - 0.2) < 0.01
+
+
+def test_split_does_not_depend_on_chunk_size():
+    n_rows = 10_007
+    whole = hash_split_mask(0, n_rows, 0.2, 42)
+    for chunk_size in (1, 333, 4096):
+        chunks = [hash_split_mask(start, min(chunk_size, n_rows - start), 0.2, 42)
+                  for start in range(0, n_rows, chunk_size)]
+        np.testing.assert_array_equal(np.concatenate(chunks), whole)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.data_transformation import DataTransformation
+from src.components.feature_encoder import FeatureEncoder
+from src.schema import CATEGORICAL_COLUMNS, CATEGORY_DOMAINS, NUMERICAL_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    # small synthetic training set, so the check never depends on local artifacts
+    rng = np.random.default_rng(0)
+    n_rows = 200
+    train = pd.DataFrame({column: rng.choice(domain, n_rows) for column, domain in CATEGORY_DOMAINS.items()})
+    for column in NUMERICAL_COLUMNS:
+        train[column] = rng.integers(0, 101, n_rows).astype(float)
+
+    preprocessor = DataTransformation().get_data_transformer_object().fit(train)
+    return preprocessor, FeatureEncoder.from_preprocessor(preprocessor)
+
+
+@pytest.fixture
+def records():
+    df = pd.DataFrame({column: [domain[i % len(domain)] for i in range(6)] for column, domain in CATEGORY_DOMAINS.items()})
+    df["reading_score"] = [72.0, np.nan, 90.0, 0.0, 100.0, 55.0]   # a missing score is imputed
+    df["writing_score"] = [74.0, 88.0, np.nan, 10.0, 99.0, 61.0]
+    df.loc[3, "gender"] = np.nan                                    # a missing categorical is imputed
+    df.loc[4, "lunch"] = np.nan
+    return df[CATEGORICAL_COLUMNS + NUMERICAL_COLUMNS]
+
+
+def test_transform_matches_preprocessor(fitted, records):
+    preprocessor, encoder = fitted
+    np.testing.assert_allclose(encoder.transform(records), preprocessor.transform(records), rtol=0, atol=1e-12)
+
+
+def test_transform_record_matches_preprocessor(fitted, records):
+    preprocessor, encoder = fitted
+    expected = preprocessor.transform(records)
+    compiled = np.vstack([encoder.transform_record(record) for record in records.to_dict("records")])
+    np.testing.assert_allclose(compiled, expected, rtol=0, atol=1e-12)
+
+    # tuples in input_columns order give the same rows
+    as_tuples = records[encoder.input_columns].itertuples(index=False)
+    np.testing.assert_allclose(np.vstack([encoder.transform_record(tuple(row)) for row in as_tuples]),
+                               expected, rtol=0, atol=1e-12)
+
+
+def test_unknown_category_is_rejected(fitted, records):
+    preprocessor, encoder = fitted
+    records.loc[1, "race_ethnicity"] = "group Z"
+
+    with pytest.raises(ValueError):
+        preprocessor.transform(records)
+    with pytest.raises(ValueError, match="group Z"):
+        encoder.transform(records)
+    with pytest.raises(ValueError, match="group Z"):
+        encoder.transform_record(records.iloc[1].to_dict())